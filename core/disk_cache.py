@@ -0,0 +1,96 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+
+def file_fingerprint(path: str, sample_size: int = 1024 * 1024) -> str:
+    """Fast content fingerprint: file size plus hashes of the first, middle
+    and last ``sample_size`` bytes."""
+    size = os.path.getsize(path)
+    h = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, "rb") as f:
+        for offset in (0, size // 2, size - sample_size):
+            f.seek(max(0, offset))
+            h.update(f.read(sample_size))
+    return h.hexdigest()
+
+
+class DiskCache:
+    """Size-bounded key/value store with one file per entry.
+
+    Entries are written to a temporary file and moved into place with
+    ``os.replace``, so several processes can share a directory without
+    seeing partial files. Reads refresh the modification time, which the
+    eviction uses as LRU order.
+    """
+
+    EVICT_EVERY = 64  # puts between size checks
+
+    def __init__(self, directory: str, max_bytes: int = 200 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+
+    def _path(self, key: str) -> Path:
+        name = hashlib.sha1(key.encode()).hexdigest()
+        return self.directory / name[:2] / name
+
+    def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except OSError:
+                Path(tmp).unlink(missing_ok=True)
+                return
+        except OSError:
+            return
+        self._puts += 1
+        if self._puts % self.EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until under the budget."""
+        entries = []
+        total = 0
+        for path in self.directory.glob("*/*"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue  # removed by another process
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        for path in self.directory.glob("*/*"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
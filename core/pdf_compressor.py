@@ -1,5 +1,16 @@
+import contextlib
 import fitz
+import hashlib
+import io
+import math
+import shutil
+import zlib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from PIL import Image
+
+from core.disk_cache import DiskCache
 
 QUALITY_MAP = {
     "niedrig": 30,
@@ -8,50 +19,773 @@ QUALITY_MAP = {
 }
 
 
+DPI_OPTIONS = [300, 200, 150]
+
+# Quality "auto": lowest of these JPEG qualities whose result stays above
+# SSIM_THRESHOLD compared to the source image
+AUTO_QUALITY = "auto"
+AUTO_QUALITIES = [30, 40, 50, 60, 70, 80, 90]
+SSIM_THRESHOLD = 0.95
+SSIM_SIZE = 1024  # long side of the luma channel that is compared
+
+_auto_quality_cache = {}  # (image hash, scale, threshold) -> quality
+
+
+# Scan detection: an RGB image counts as gray if at most GRAY_OUTLIERS of
+# its pixels have channels further apart than GRAY_TOLERANCE and no
+# COLOUR_BLOCK x COLOUR_BLOCK tile has COLOUR_BLOCK_RATIO of them (a stamp
+# or signature, not scanner noise). A gray image counts as bilevel if at
+# least BILEVEL_RATIO of its pixels are darker than BILEVEL_DARK or
+# lighter than BILEVEL_LIGHT.
+GRAY_TOLERANCE = 16
+GRAY_OUTLIERS = 0.001
+COLOUR_BLOCK = 8
+COLOUR_BLOCK_RATIO = 0.25
+BILEVEL_DARK = 64
+BILEVEL_LIGHT = 192
+BILEVEL_RATIO = 0.97
+DETECT_PIXELS = 1_000_000  # pixels sampled for the checks
+
+DCT = "DCTDecode"
+FLATE = "FlateDecode"
+
+
+def _open_image(data: bytes, scale: float) -> Image.Image:
+    pil_img = Image.open(io.BytesIO(data))
+    if pil_img.mode == "1":
+        pil_img = pil_img.convert("L")
+    elif pil_img.mode not in ("RGB", "L"):
+        pil_img = pil_img.convert("RGB")
+    if scale < 1.0:
+        size = (max(1, round(pil_img.width * scale)),
+                max(1, round(pil_img.height * scale)))
+        pil_img = pil_img.resize(size, Image.Resampling.LANCZOS)
+    return pil_img
+
+
+def colour_class(pil_img: Image.Image) -> str:
+    """Return "1" for bilevel, "L" for grayscale or "RGB" for colour
+    content of an RGB or L image."""
+    arr = np.asarray(pil_img)
+    step = max(1, math.isqrt(arr.shape[0] * arr.shape[1] // DETECT_PIXELS))
+    arr = arr[::step, ::step]
+    if arr.ndim == 3:
+        r, g, b = arr[..., 0], arr[..., 1], arr[..., 2]
+        spread = (np.maximum(np.maximum(r, g), b)
+                  - np.minimum(np.minimum(r, g), b))
+        coloured = spread > GRAY_TOLERANCE
+        if (np.count_nonzero(coloured) > coloured.size * GRAY_OUTLIERS
+                or _has_colour_region(coloured)):
+            return "RGB"
+        arr = arr[..., 1]
+    hist = np.bincount(arr.ravel(), minlength=256)
+    extremes = hist[:BILEVEL_DARK].sum() + hist[BILEVEL_LIGHT:].sum()
+    return "1" if extremes >= arr.size * BILEVEL_RATIO else "L"
+
+
+def _has_colour_region(coloured: np.ndarray) -> bool:
+    h = coloured.shape[0] - coloured.shape[0] % COLOUR_BLOCK
+    w = coloured.shape[1] - coloured.shape[1] % COLOUR_BLOCK
+    if not h or not w:
+        return bool(coloured.any())
+    tiles = coloured[:h, :w].reshape(h // COLOUR_BLOCK, COLOUR_BLOCK,
+                                     w // COLOUR_BLOCK, COLOUR_BLOCK)
+    counts = tiles.sum(axis=(1, 3))
+    return bool((counts >= COLOUR_BLOCK ** 2 * COLOUR_BLOCK_RATIO).any())
+
+
+def _save_jpeg(pil_img: Image.Image, quality: int) -> bytes:
+    buf = io.BytesIO()
+    pil_img.save(buf, format="JPEG", quality=quality, optimize=True)
+    return buf.getvalue()
+
+
+def _luma(pil_img: Image.Image) -> np.ndarray:
+    img = pil_img.convert("L")
+    img.thumbnail((SSIM_SIZE, SSIM_SIZE), Image.Resampling.BILINEAR)
+    return np.asarray(img, dtype=np.float64)
+
+
+def ssim(a: np.ndarray, b: np.ndarray, block: int = 8) -> float:
+    """Mean SSIM of two equally sized grayscale arrays over block x block
+    tiles (the whole array if it is smaller than one tile)."""
+    h, w = a.shape
+    if h >= block and w >= block:
+        h, w = h - h % block, w - w % block
+        shape = (h // block, block, w // block, block)
+        a = a[:h, :w].reshape(shape).swapaxes(1, 2)
+        b = b[:h, :w].reshape(shape).swapaxes(1, 2)
+        axes = (2, 3)
+    else:
+        axes = (0, 1)
+    mu_a = a.mean(axis=axes)
+    mu_b = b.mean(axis=axes)
+    var_a = a.var(axis=axes)
+    var_b = b.var(axis=axes)
+    cov = (a * b).mean(axis=axes) - mu_a * mu_b
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    s = ((2 * mu_a * mu_b + c1) * (2 * cov + c2)
+         / ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2)))
+    return float(s.mean())
+
+
+def _search_quality(pil_img: Image.Image,
+                    threshold: float) -> tuple[bytes, int]:
+    """Lowest quality of AUTO_QUALITIES that keeps the SSIM to the source
+    at or above ``threshold`` (the highest if none does)."""
+    reference = _luma(pil_img)
+    best = None
+    lo, hi = 0, len(AUTO_QUALITIES) - 1
+    while lo <= hi:  # SSIM grows with the quality, so bisect the list
+        mid = (lo + hi) // 2
+        jpeg = _save_jpeg(pil_img, AUTO_QUALITIES[mid])
+        score = ssim(reference, _luma(Image.open(io.BytesIO(jpeg))))
+        if score >= threshold:
+            best = (jpeg, AUTO_QUALITIES[mid])
+            hi = mid - 1
+        else:
+            lo = mid + 1
+    if best is None:
+        best = (_save_jpeg(pil_img, AUTO_QUALITIES[-1]), AUTO_QUALITIES[-1])
+    return best
+
+
+def encode_image(data: bytes, quality: int | None, scale: float = 1.0,
+                 threshold: float = SSIM_THRESHOLD):
+    """Re-encode an extracted image, optionally downsampled.
+
+    Bilevel content is stored as 1-bit Flate. Grayscale content is stored
+    as 8-bit gray, as Flate if that is smaller than the JPEG. Everything
+    else becomes a JPEG; with ``quality`` None the quality is chosen per
+    image by SSIM (see ``_search_quality``).
+
+    Returns (data, width, height, mode, quality, filter); quality is None
+    for lossless results.
+    """
+    return _encode_pil(_open_image(data, scale), quality, threshold)
+
+
+def _encode_pil(pil_img: Image.Image, quality: int | None,
+                threshold: float = SSIM_THRESHOLD, kind: str | None = None):
+    kind = kind or colour_class(pil_img)
+    size = pil_img.width, pil_img.height
+    if kind == "1":
+        bits = pil_img.convert("L").convert("1", dither=Image.Dither.NONE)
+        return zlib.compress(bits.tobytes(), 9), *size, "1", None, FLATE
+    if kind == "L":
+        pil_img = pil_img.convert("L")
+    if quality is None:
+        jpeg, quality = _search_quality(pil_img, threshold)
+    else:
+        jpeg = _save_jpeg(pil_img, quality)
+    if kind == "L":
+        flate = zlib.compress(pil_img.tobytes(), 9)
+        if len(flate) < len(jpeg):
+            return flate, *size, "L", None, FLATE
+    return jpeg, *size, pil_img.mode, quality, DCT
+
+
+def _encode_job(job: tuple[bytes, int | None, float, float]):
+    """Process pool entry point; a broken image must not stop the batch."""
+    try:
+        return encode_image(*job)
+    except Exception:
+        return None
+
+
+def _pack_result(result) -> bytes:
+    """Serialize an encode result for the disk cache."""
+    if not result:
+        return b"-\n"
+    data, width, height, mode, quality, filter_ = result
+    return f"{width} {height} {mode} {quality} {filter_}\n".encode() + data
+
+
+def _unpack_result(data: bytes):
+    header, _, image = data.partition(b"\n")
+    if header == b"-":
+        return None
+    width, height, mode, quality, filter_ = header.decode().split()
+    return (image, int(width), int(height), mode,
+            None if quality == "None" else int(quality), filter_)
+
+
 class PDFCompressor:
     """Compress PDF by reducing image quality and cleaning up."""
 
+    BATCH_BYTES = 64 * 1024 * 1024  # stored image bytes per encode batch
+    LOW_MEMORY_SIZE = 512 * 1024 * 1024  # files from here on use low_memory
+
     @staticmethod
     def compress(input_path: str, output_path: str,
-                 quality: str = "mittel") -> tuple[int, int]:
-        jpeg_quality = QUALITY_MAP.get(quality, 60)
+                 quality: str = "mittel", workers: int = 1,
+                 target_dpi: int | None = None,
+                 stats: dict | None = None,
+                 cache: DiskCache | None = None,
+                 batch_bytes: int | None = None,
+                 low_memory: bool = False) -> tuple[int, int]:
+        """Re-encode images as JPEG, scans as gray or 1-bit Flate.
+
+        With ``target_dpi`` every image whose effective resolution at its
+        largest placement is higher gets resampled down to that DPI.
+        With ``workers`` > 1 the encoding runs in a process pool; the
+        results are written back in xref order, so the output does not
+        depend on the worker count.
+
+        Quality ``AUTO_QUALITY`` picks the quality per image (see
+        ``encode_image``). If ``stats`` is given, it receives
+        ``"qualities"``: the JPEG quality of every replaced image by xref,
+        and ``"lossless"``: the xrefs stored as Flate.
+        With a ``cache`` encoded images are reused across documents and
+        ``stats`` also receives the cache hits and misses.
+
+        Images are extracted and encoded in batches of about
+        ``batch_bytes``. With ``low_memory`` the work happens on a copy
+        (``output_path`` + ".part") that is saved incrementally after
+        every batch, so memory use does not grow with the document.
+        """
         original_size = Path(input_path).stat().st_size
+        if quality != AUTO_QUALITY:
+            quality = QUALITY_MAP.get(quality, 60)
+
+        batch_bytes = batch_bytes or PDFCompressor.BATCH_BYTES
+        part_path = output_path + ".part"
+        if low_memory:
+            shutil.copyfile(input_path, part_path)
+            doc = fitz.open(part_path)
+            low_memory = doc.can_save_incrementally()
+        else:
+            doc = fitz.open(input_path)
+
+        qualities = {}
+        lossless = []
+        try:
+            dpis = PDFCompressor.effective_dpis(doc) if target_dpi else {}
+            # Every image object is re-encoded once, however many pages
+            # use it
+            xrefs = PDFCompressor._recompressible(doc)
+            with PDFCompressor._pool(workers) as pool:
+                start = 0
+                while start < len(xrefs):
+                    images, start = PDFCompressor._next_batch(
+                        doc, xrefs, start, batch_bytes)
+                    scales = [PDFCompressor._scale(dpis.get(xref), target_dpi)
+                              for xref, _ in images]
+                    results = PDFCompressor._encode_images(
+                        images, scales, quality, pool, cache, stats)
+                    batch = [xref for xref, _ in images]
+                    del images
+                    for xref, result in zip(batch, results):
+                        if not result:
+                            continue
+                        data, width, height, mode, jpeg_q, filter_ = result
+                        if not PDFCompressor._replace_image(
+                                doc, xref, data, width, height, mode, filter_):
+                            continue
+                        if jpeg_q is None:
+                            lossless.append(xref)
+                        else:
+                            qualities[xref] = jpeg_q
+                    del results
+                    if low_memory:
+                        # Write the new streams to the .part file and
+                        # reopen it, so MuPDF drops them from memory
+                        doc.saveIncr()
+                        doc.close()
+                        doc = fitz.open(part_path)
+            if stats is not None:
+                stats["qualities"] = qualities
+                stats["lossless"] = lossless
+            doc.save(output_path, garbage=4, deflate=True, clean=True)
+        finally:
+            doc.close()
+            Path(part_path).unlink(missing_ok=True)
+        new_size = Path(output_path).stat().st_size
+        return original_size, new_size
 
+    # (JPEG quality, max. dpi) from best to smallest
+    SIZE_STEPS = [(85, None), (75, None), (60, None), (60, 300), (50, 200),
+                  (40, 150), (30, 150), (25, 100)]
+    MAX_SIZE_RETRIES = 2
+
+    @staticmethod
+    def compress_to_size(input_path: str, output_path: str, max_bytes: int,
+                         workers: int = 1,
+                         cache: DiskCache | None = None) -> tuple[int, int]:
+        """Compress with the best SIZE_STEPS setting that fits max_bytes.
+
+        The steps are bisected on an estimate (bytes outside the images
+        plus each image's encoded size), so only the chosen setting is
+        saved. If the real file is still too large, up to
+        MAX_SIZE_RETRIES further steps are written. The result may exceed
+        max_bytes when even the last step does not fit.
+        """
+        original_size = Path(input_path).stat().st_size
         doc = fitz.open(input_path)
+        dpis = PDFCompressor.effective_dpis(doc)
+        images = PDFCompressor._extract_images(doc)
+        stored = [PDFCompressor._stored_size(doc, xref) for xref, _ in images]
+        other = max(0, original_size - sum(stored))
+        with PDFCompressor._pool(workers) as pool:
+            encoded = {}  # step -> encode results
+
+            def results_for(step: int) -> list:
+                if step not in encoded:
+                    quality, dpi = PDFCompressor.SIZE_STEPS[step]
+                    scales = [PDFCompressor._scale(dpis.get(xref), dpi)
+                              for xref, _ in images]
+                    encoded[step] = PDFCompressor._encode_images(
+                        images, scales, quality, pool, cache)
+                return encoded[step]
+
+            def estimate(step: int) -> int:
+                results = results_for(step)
+                return other + sum(min(size, len(r[0])) if r else size
+                                   for size, r in zip(stored, results))
+
+            last = len(PDFCompressor.SIZE_STEPS) - 1
+            lo, hi = 0, last
+            while lo < hi and images:
+                mid = (lo + hi) // 2
+                if estimate(mid) <= max_bytes:
+                    hi = mid
+                else:
+                    lo = mid + 1
+
+            step = lo
+            for attempt in range(PDFCompressor.MAX_SIZE_RETRIES + 1):
+                if attempt:
+                    doc = fitz.open(input_path)
+                if images:
+                    for (xref, _), result in zip(images, results_for(step)):
+                        if result:
+                            PDFCompressor._replace_image(
+                                doc, xref, *result[:4], result[5])
+                doc.save(output_path, garbage=4, deflate=True, clean=True)
+                doc.close()
+                new_size = Path(output_path).stat().st_size
+                if new_size <= max_bytes or step == last or not images:
+                    break
+                step += 1
+        return original_size, new_size
+
+    @staticmethod
+    def _recompressible(doc: fitz.Document) -> list[int]:
+        xrefs = []
+        for xref in PDFCompressor.image_usage(doc):
+            try:
+                if PDFCompressor._can_recompress(doc, xref):
+                    xrefs.append(xref)
+            except Exception:
+                continue
+        return xrefs
 
-        for page_num in range(doc.page_count):
-            page = doc[page_num]
-            images = page.get_images(full=True)
-            for img in images:
-                xref = img[0]
-                try:
-                    base_image = doc.extract_image(xref)
-                    if not base_image:
-                        continue
-                    img_bytes = base_image["image"]
-                    from PIL import Image
-                    import io
-                    pil_img = Image.open(io.BytesIO(img_bytes))
-                    if pil_img.mode in ("RGBA", "P"):
-                        pil_img = pil_img.convert("RGB")
-                    buf = io.BytesIO()
-                    pil_img.save(buf, format="JPEG", quality=jpeg_quality,
-                                 optimize=True)
-                    new_bytes = buf.getvalue()
-                    doc._deleteObject(xref)
-                    page.delete_image(xref)
-                    rect = page.get_image_rects(xref)
-                    if rect:
-                        for r in rect:
-                            page.insert_image(r, stream=new_bytes)
-                except Exception:
+    @staticmethod
+    def _extract(doc: fitz.Document, xref: int) -> bytes | None:
+        try:
+            base_image = doc.extract_image(xref)
+        except Exception:
+            return None
+        return base_image["image"] if base_image else None
+
+    @staticmethod
+    def _extract_images(doc: fitz.Document) -> list[tuple[int, bytes]]:
+        """(xref, encoded image) of every image that may be re-encoded."""
+        images = []
+        for xref in PDFCompressor._recompressible(doc):
+            data = PDFCompressor._extract(doc, xref)
+            if data:
+                images.append((xref, data))
+        return images
+
+    @staticmethod
+    def _next_batch(doc: fitz.Document, xrefs: list[int], start: int,
+                    batch_bytes: int) -> tuple[list[tuple[int, bytes]], int]:
+        """Extract images from ``xrefs[start:]`` until about ``batch_bytes``
+        are collected; returns the batch and the next start index."""
+        images = []
+        size = 0
+        while start < len(xrefs) and size < batch_bytes:
+            data = PDFCompressor._extract(doc, xrefs[start])
+            if data:
+                images.append((xrefs[start], data))
+                size += len(data)
+            start += 1
+        return images, start
+
+    @staticmethod
+    def _scale(dpi: float | None, target_dpi: int | None) -> float:
+        if not dpi or not target_dpi:
+            return 1.0
+        return min(1.0, target_dpi / dpi)
+
+    @staticmethod
+    def _pool(workers: int):
+        """Process pool for the encoding, or a no-op context for one
+        worker. Worker processes only start once jobs are submitted."""
+        if workers > 1:
+            return ProcessPoolExecutor(max_workers=workers)
+        return contextlib.nullcontext()
+
+    @staticmethod
+    def _encode_all(jobs: list, pool: ProcessPoolExecutor | None) -> list:
+        if pool is not None and len(jobs) > 1:
+            return list(pool.map(_encode_job, jobs))
+        return [_encode_job(job) for job in jobs]
+
+    @staticmethod
+    def _encode_images(images: list[tuple[int, bytes]], scales: list[float],
+                       quality: int | str, pool: ProcessPoolExecutor | None,
+                       cache: DiskCache | None = None,
+                       stats: dict | None = None) -> list:
+        """Encode every image at ``quality`` (a JPEG quality or
+        AUTO_QUALITY); returns the ``encode_image`` result or None per
+        image.
+
+        Images with identical data are encoded once. With a ``cache`` the
+        results are looked up and stored by content hash and parameters;
+        ``stats`` then receives ``"cache_hits"`` and ``"cache_misses"``.
+        """
+        digests = [hashlib.blake2b(data, digest_size=16).hexdigest()
+                   for _, data in images]
+        params = (f"{quality}:{SSIM_THRESHOLD}" if quality == AUTO_QUALITY
+                  else str(quality))
+        keys = [f"image:{digest}:{round(scale, 4)}:{params}"
+                for digest, scale in zip(digests, scales)]
+
+        results = {}
+        pending = {}  # key -> index of the first image with that key
+        hits = 0
+        for i, key in enumerate(keys):
+            if key in results or key in pending:
+                continue
+            data = cache.get(key) if cache is not None else None
+            if data is None:
+                pending[key] = i
+            else:
+                results[key] = _unpack_result(data)
+                hits += 1
+
+        order = list(pending.values())
+        if quality == AUTO_QUALITY:
+            # A quality found earlier for the same image skips the search
+            auto_keys = [(digests[i], round(scales[i], 4), SSIM_THRESHOLD)
+                         for i in order]
+            jobs = [(images[i][1], _auto_quality_cache.get(key), scales[i],
+                     SSIM_THRESHOLD) for i, key in zip(order, auto_keys)]
+        else:
+            jobs = [(images[i][1], quality, scales[i], SSIM_THRESHOLD)
+                    for i in order]
+        encoded = PDFCompressor._encode_all(jobs, pool)
+        del jobs
+        if quality == AUTO_QUALITY:
+            for key, result in zip(auto_keys, encoded):
+                if result and result[4] is not None:
+                    _auto_quality_cache[key] = result[4]
+
+        for key, result in zip(pending, encoded):
+            results[key] = result
+            if cache is not None:
+                cache.put(key, _pack_result(result))
+        if stats is not None and cache is not None:
+            stats["cache_hits"] = stats.get("cache_hits", 0) + hits
+            stats["cache_misses"] = (stats.get("cache_misses", 0)
+                                     + len(pending))
+        return [results[key] for key in keys]
+
+    SAMPLE_IMAGES = 8  # images sample-encoded by analyze()
+    SAMPLE_PIXELS = 512  # side of the centre crop that is encoded
+    SAMPLE_REDUCTION = 2  # JPEG samples are decoded at up to 1/2 size
+
+    @staticmethod
+    def analyze(input_path: str, target_dpi: int | None = None) -> dict:
+        """Dry run: describe the images and project the output size of
+        each QUALITY_MAP preset without writing a file.
+
+        Returns a dict with ``"size"``, ``"images"`` (xref, width, height,
+        dpi, filter, bytes and pages per image xref) and ``"projected"``
+        (preset -> estimated bytes). To keep the time independent of the
+        page count, dpi is only measured on the first page of the sampled
+        images (None for images not shown there). The estimate JPEG-encodes a centre
+        crop of up to SAMPLE_IMAGES images, spread over the size range,
+        and scales the bytes per pixel to the whole image. A crop decoded
+        coarser than the output is also encoded at half its size, and the
+        bytes per pixel are extrapolated from the two.
+        """
+        size = Path(input_path).stat().st_size
+        doc = fitz.open(input_path)
+        try:
+            return PDFCompressor._analyze(doc, size, target_dpi)
+        finally:
+            doc.close()
+
+    @staticmethod
+    def _analyze(doc: fitz.Document, size: int,
+                 target_dpi: int | None) -> dict:
+        usage = PDFCompressor.image_usage(doc)
+        images = []
+        candidates = []
+        for xref, pages in usage.items():
+            kind, filter_ = doc.xref_get_key(xref, "Filter")
+            info = {
+                "xref": xref,
+                "width": int(doc.xref_get_key(xref, "Width")[1] or 0),
+                "height": int(doc.xref_get_key(xref, "Height")[1] or 0),
+                "dpi": None,
+                "filter": filter_.lstrip("/") if kind == "name"
+                          else "" if kind == "null" else filter_,
+                "bytes": PDFCompressor._stored_size(doc, xref),
+                "pages": pages,
+            }
+            images.append(info)
+            if PDFCompressor._can_recompress(doc, xref):
+                candidates.append(info)
+
+        candidates.sort(key=lambda info: info["bytes"])
+        count = min(len(candidates), PDFCompressor.SAMPLE_IMAGES)
+        sample = [candidates[i * len(candidates) // count]
+                  for i in range(count)]
+        # only the first page of each sampled image: a pass over every
+        # page would grow with the page count
+        dpis = PDFCompressor.effective_dpis(
+            doc, {info["xref"]: info["pages"][:1] for info in sample})
+        for info in images:
+            if info["xref"] in dpis:
+                info["dpi"] = round(dpis[info["xref"]])
+        stored = {preset: 0 for preset in QUALITY_MAP}
+        projected = dict(stored)
+        for info in sample:
+            scale = PDFCompressor._scale(dpis.get(info["xref"]), target_dpi)
+            try:
+                crop, area, resolution = PDFCompressor._sample_crop(
+                    doc, info["xref"], scale)
+            except Exception:
+                continue
+            zoom = scale / resolution  # output pixels per crop pixel
+            if zoom < 1.0:
+                crop = crop.resize((max(1, round(crop.width * zoom)),
+                                    max(1, round(crop.height * zoom))),
+                                   Image.Resampling.LANCZOS)
+            coarse = (crop.reduce(2) if zoom > 1.0 and min(crop.size) >= 2
+                      else None)
+            kind = colour_class(crop)
+            for preset, quality in QUALITY_MAP.items():
+                per_pixel = (len(_encode_pil(crop, quality, kind=kind)[0])
+                             / (crop.width * crop.height))
+                if coarse is not None:
+                    coarse_per_pixel = (
+                        len(_encode_pil(coarse, quality, kind=kind)[0])
+                        / (coarse.width * coarse.height))
+                    per_pixel *= ((per_pixel / coarse_per_pixel)
+                                  ** math.log2(zoom))
+                estimate = per_pixel * area * scale ** 2
+                stored[preset] += info["bytes"]
+                projected[preset] += min(info["bytes"], estimate)
+
+        candidate_bytes = sum(info["bytes"] for info in candidates)
+        result = {"size": size, "images": images, "projected": {}}
+        for preset in QUALITY_MAP:
+            ratio = (projected[preset] / stored[preset]
+                     if stored[preset] else 1.0)
+            result["projected"][preset] = round(
+                size - candidate_bytes * (1 - ratio))
+        return result
+
+    @staticmethod
+    def _sample_crop(doc: fitz.Document, xref: int, scale: float = 1.0
+                     ) -> tuple[Image.Image, int, float]:
+        """Centre crop of an image xref, the pixel count of the image and
+        the resolution the crop was decoded at (1.0 = full size).
+
+        JPEGs are decoded by PIL in draft mode at ``scale``, but at most
+        SAMPLE_REDUCTION times smaller, which skips most of the decoding
+        work; other images are decoded at full size.
+        """
+        width = int(doc.xref_get_key(xref, "Width")[1])
+        height = int(doc.xref_get_key(xref, "Height")[1])
+        if doc.xref_get_key(xref, "Filter")[1] == "/" + DCT:
+            img = Image.open(io.BytesIO(doc.xref_stream_raw(xref)))
+            reduce_to = max(scale, 1 / PDFCompressor.SAMPLE_REDUCTION)
+            img.draft("L" if img.mode == "L" else "RGB",
+                      (math.ceil(width * reduce_to),
+                       math.ceil(height * reduce_to)))
+            if img.mode not in ("L", "RGB"):
+                img = img.convert("RGB")
+        else:
+            pix = fitz.Pixmap(doc, xref)
+            if pix.alpha or pix.n not in (1, 3):
+                pix = fitz.Pixmap(fitz.csRGB, pix)
+            mode = "L" if pix.n == 1 else "RGB"
+            img = Image.frombuffer(mode, (pix.width, pix.height),
+                                   pix.samples_mv, "raw", mode, pix.stride, 1)
+        side = PDFCompressor.SAMPLE_PIXELS
+        left = max(0, (img.width - side) // 2)
+        top = max(0, (img.height - side) // 2)
+        crop = img.crop((left, top, min(img.width, left + side),
+                         min(img.height, top + side)))
+        return crop, width * height, img.width / width
+
+    @staticmethod
+    def image_usage(doc: fitz.Document) -> dict[int, list[int]]:
+        """Map each image xref to the pages that display it."""
+        usage = {}
+        for pno in range(doc.page_count):
+            for img in doc.get_page_images(pno, full=True):
+                pages = usage.setdefault(img[0], [])
+                if not pages or pages[-1] != pno:
+                    pages.append(pno)
+        return usage
+
+    @staticmethod
+    def effective_dpis(doc: fitz.Document,
+                       usage: dict[int, list[int]] | None = None
+                       ) -> dict[int, float]:
+        """Resolution of each image xref at its largest placement.
+
+        Uses one ``get_image_info`` pass per page with images; the
+        transform gives the placed size in points even for rotated or
+        skewed placements. Placements are matched to xrefs by pixel size,
+        which needs no decoding. Only pages showing two different images
+        of the same size fall back to the MD5-based ``xrefs=True`` lookup.
+        """
+        if usage is None:
+            usage = PDFCompressor.image_usage(doc)
+        dpis = {}
+        for pno in sorted({pno for pages in usage.values() for pno in pages}):
+            page = doc[pno]
+            by_size = {}
+            for img in page.get_images(full=True):
+                by_size.setdefault((img[2], img[3]), set()).add(img[0])
+            if any(len(xrefs) > 1 for xrefs in by_size.values()):
+                infos = page.get_image_info(xrefs=True)
+            else:
+                infos = page.get_image_info()
+                for info in infos:
+                    xrefs = by_size.get((info["width"], info["height"]))
+                    info["xref"] = next(iter(xrefs)) if xrefs else 0
+            for info in infos:
+                xref = info["xref"]
+                a, b, c, d = info["transform"][:4]
+                width_in = math.hypot(a, b) / 72
+                height_in = math.hypot(c, d) / 72
+                if not xref or width_in <= 0 or height_in <= 0:
                     continue
+                dpi = min(info["width"] / width_in, info["height"] / height_in)
+                dpis[xref] = min(dpi, dpis.get(xref, dpi))
+        return dpis
 
-        doc.save(output_path, garbage=4, deflate=True, clean=True)
-        new_size = Path(output_path).stat().st_size
+    @staticmethod
+    def _can_recompress(doc: fitz.Document, xref: int) -> bool:
+        """Stencil masks and colour-key masked images must stay as they are."""
+        if doc.xref_get_key(xref, "ImageMask")[1] == "true":
+            return False
+        return doc.xref_get_key(xref, "Mask")[0] != "array"
+
+    @staticmethod
+    def _stored_size(doc: fitz.Document, xref: int) -> int:
+        kind, value = doc.xref_get_key(xref, "Length")
+        return int(value) if kind == "int" else len(doc.xref_stream_raw(xref))
+
+    @staticmethod
+    def _replace_image(doc: fitz.Document, xref: int, data: bytes,
+                       width: int, height: int, mode: str,
+                       filter_: str = DCT) -> bool:
+        """Swap the stream of an image object in place.
+
+        ``data`` is a JPEG or, for ``FLATE``, the deflated samples of a
+        mode "1", "L" or "RGB" image. All pages referencing the xref pick
+        up the new stream. Nothing is changed if the new stream is not
+        smaller than the stored one.
+        """
+        if len(data) >= PDFCompressor._stored_size(doc, xref):
+            return False
+        doc.update_stream(xref, data, compress=False)
+        doc.xref_set_key(xref, "Filter", f"/{filter_}")
+        doc.xref_set_key(xref, "ColorSpace",
+                         "/DeviceRGB" if mode == "RGB" else "/DeviceGray")
+        doc.xref_set_key(xref, "BitsPerComponent",
+                         "1" if mode == "1" else "8")
+        doc.xref_set_key(xref, "Width", str(width))
+        doc.xref_set_key(xref, "Height", str(height))
+        for key in ("Decode", "DecodeParms"):
+            if doc.xref_get_key(xref, key)[0] != "null":
+                doc.xref_set_key(xref, key, "null")
+        return True
+
+    @staticmethod
+    def deep_clean(input_path: str, output_path: str,
+                   stats: dict | None = None) -> tuple[int, int]:
+        """Structural compression without touching image quality.
+
+        On top of ``simple_compress``: subsets embedded fonts, drops page
+        thumbnails, XMP metadata and private application data (PieceInfo)
+        and writes object streams. Duplicate fonts and unreferenced
+        objects such as orphaned embedded files are removed by the
+        garbage collection. If ``stats`` is given, it receives
+        ``"before"`` and ``"after"``: ``size_breakdown`` of both files.
+        """
+        original_size = Path(input_path).stat().st_size
+        doc = fitz.open(input_path)
+        if stats is not None:
+            stats["before"] = PDFCompressor.size_breakdown(doc, original_size)
+
+        try:
+            # MuPDF's own subsetter (PyMuPDF >= 1.24.2), no fontTools needed
+            doc.subset_fonts(fallback=False)
+        except fitz.mupdf.FzErrorBase:
+            pass  # fonts MuPDF cannot subset stay as they are
+        for page in doc:
+            for key in ("Thumb", "PieceInfo"):
+                if doc.xref_get_key(page.xref, key)[0] != "null":
+                    doc.xref_set_key(page.xref, key, "null")
+        doc.del_xml_metadata()
+        catalog = doc.pdf_catalog()
+        if doc.xref_get_key(catalog, "PieceInfo")[0] != "null":
+            doc.xref_set_key(catalog, "PieceInfo", "null")
+        for xref in range(1, doc.xref_length()):
+            if doc.xref_get_key(xref, "Metadata")[0] == "xref":
+                doc.xref_set_key(xref, "Metadata", "null")
+
+        doc.save(output_path, garbage=4, deflate=True, clean=True,
+                 use_objstms=1)
         doc.close()
+        new_size = Path(output_path).stat().st_size
+        if stats is not None:
+            with fitz.open(output_path) as out:
+                stats["after"] = PDFCompressor.size_breakdown(out, new_size)
         return original_size, new_size
 
+    @staticmethod
+    def size_breakdown(doc: fitz.Document, file_size: int) -> dict[str, int]:
+        """Bytes per category: "images", "fonts", "content" (page content
+        streams) and "other" (everything else up to ``file_size``)."""
+        fonts = set()
+        content = set()
+        for page in doc:
+            content.update(page.get_contents())
+        sizes = {"images": 0, "fonts": 0, "content": 0}
+        for xref in range(1, doc.xref_length()):
+            if doc.xref_get_key(xref, "Type")[1] == "/FontDescriptor":
+                for key in ("FontFile", "FontFile2", "FontFile3"):
+                    kind, value = doc.xref_get_key(xref, key)
+                    if kind == "xref":
+                        fonts.add(int(value.split()[0]))
+        for xref in range(1, doc.xref_length()):
+            if not doc.xref_is_stream(xref):
+                continue
+            if doc.xref_get_key(xref, "Subtype")[1] == "/Image":
+                category = "images"
+            elif xref in fonts:
+                category = "fonts"
+            elif xref in content:
+                category = "content"
+            else:
+                continue
+            sizes[category] += (PDFCompressor._stored_size(doc, xref)
+                                + len(doc.xref_object(xref, compressed=True)))
+        sizes["other"] = max(0, file_size - sum(sizes.values()))
+        return sizes
+
     @staticmethod
     def simple_compress(input_path: str, output_path: str) -> tuple[int, int]:
         """Lightweight compression: garbage collection + deflate only."""
@@ -1,14 +1,55 @@
 import fitz  # PyMuPDF
+from collections import OrderedDict
 from pathlib import Path
 
 
 class PDFHandler:
-    """Handles opening, saving, and basic PDF operations."""
+    """Handles opening, saving, and basic PDF operations.
+
+    Page mutations are reported to listeners registered with
+    ``add_listener`` as ``callback(event, *args)``:
+
+    - ``"page_changed", index``
+    - ``"pages_inserted", index, count``
+    - ``"pages_removed", index, count``
+    - ``"page_moved", from_idx, to_idx`` (``to_idx`` is the final index)
+    - ``"saved", renumbered``: ``renumbered`` is true after a full save,
+      which renumbers the objects of the open document, so anything
+      keyed by page xref is stale
+    """
+
+    DISPLAY_LIST_CACHE_SIZE = 32
 
     def __init__(self):
         self.doc: fitz.Document | None = None
         self.file_path: str | None = None
         self.modified = False
+        self._listeners = []
+        self._display_lists = OrderedDict()  # page xref -> fitz.DisplayList
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, event: str, *args):
+        if event == "saved":
+            if args[0]:
+                self._display_lists.clear()
+        else:
+            self.modified = True
+        if event == "page_changed":
+            self._drop_display_lists(args[0], 1)
+        elif event == "pages_inserted":
+            self._drop_display_lists(*args)
+        for callback in list(self._listeners):
+            callback(event, *args)
+
+    def mark_page_changed(self, index: int):
+        """Report an edit made directly on a page object."""
+        self._notify("page_changed", index)
 
     def open(self, path: str) -> fitz.Document:
         if self.doc:
@@ -20,6 +61,7 @@ class PDFHandler:
 
     def close(self):
         if self.doc:
+            self._display_lists.clear()
             self.doc.close()
             self.doc = None
             self.file_path = None
@@ -29,12 +71,14 @@ class PDFHandler:
         if not self.doc:
             raise RuntimeError("Kein PDF geoeffnet")
         target = path or self.file_path
-        if target == self.file_path:
+        incremental = target == self.file_path
+        if incremental:
             self.doc.saveIncr()
         else:
             self.doc.save(target, garbage=4, deflate=True)
         self.file_path = target
         self.modified = False
+        self._notify("saved", not incremental)
 
     def save_as(self, path: str):
         if not self.doc:
@@ -42,6 +86,7 @@ class PDFHandler:
         self.doc.save(path, garbage=4, deflate=True)
         self.file_path = path
         self.modified = False
+        self._notify("saved", True)
 
     def page_count(self) -> int:
         return self.doc.page_count if self.doc else 0
@@ -51,27 +96,53 @@ class PDFHandler:
             raise RuntimeError("Kein PDF geoeffnet")
         return self.doc[index]
 
-    def get_page_pixmap(self, index: int, zoom: float = 1.0) -> fitz.Pixmap:
+    def get_display_list(self, index: int) -> fitz.DisplayList:
+        """Parsed page content, kept in an LRU so that rendering the same
+        page at several scales interprets its content stream only once."""
         page = self.get_page(index)
+        xref = page.xref
+        dl = self._display_lists.get(xref)
+        if dl is None:
+            dl = page.get_displaylist()
+            self._display_lists[xref] = dl
+            if len(self._display_lists) > self.DISPLAY_LIST_CACHE_SIZE:
+                self._display_lists.popitem(last=False)
+        else:
+            self._display_lists.move_to_end(xref)
+        return dl
+
+    def _drop_display_lists(self, index: int, count: int):
+        for i in range(index, index + count):
+            self._display_lists.pop(self.doc.page_xref(i), None)
+
+    def get_page_pixmap(self, index: int, zoom: float = 1.0) -> fitz.Pixmap:
         mat = fitz.Matrix(zoom, zoom)
-        return page.get_pixmap(matrix=mat, alpha=False)
+        return self.get_display_list(index).get_pixmap(matrix=mat,
+                                                       alpha=False)
 
     def rotate_page(self, index: int, angle: int):
         page = self.get_page(index)
         page.set_rotation((page.rotation + angle) % 360)
-        self.modified = True
+        self._notify("page_changed", index)
 
     def delete_page(self, index: int):
         if not self.doc:
             raise RuntimeError("Kein PDF geoeffnet")
         self.doc.delete_page(index)
-        self.modified = True
+        self._notify("pages_removed", index, 1)
 
     def move_page(self, from_idx: int, to_idx: int):
+        """Move a page so that it ends up at index ``to_idx``."""
         if not self.doc:
             raise RuntimeError("Kein PDF geoeffnet")
-        self.doc.move_page(from_idx, to_idx)
-        self.modified = True
+        if from_idx == to_idx:
+            return
+        # fitz inserts in front of the target page
+        target = to_idx + 1 if to_idx > from_idx else to_idx
+        if target >= self.doc.page_count:
+            target = -1
+        self.doc.move_page(from_idx, target)
+        self._notify("page_moved", from_idx, to_idx)
 
     def insert_pages_from(self, other_path: str, at_index: int = -1):
         if not self.doc:
@@ -79,9 +150,10 @@ class PDFHandler:
         other = fitz.open(other_path)
         if at_index < 0:
             at_index = self.doc.page_count
+        count = other.page_count
         self.doc.insert_pdf(other, start_at=at_index)
         other.close()
-        self.modified = True
+        self._notify("pages_inserted", at_index, count)
 
     def file_size(self) -> int:
         if self.file_path and Path(self.file_path).exists():
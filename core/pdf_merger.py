@@ -1,9 +1,44 @@
 import fitz
+import hashlib
+import os
+import re
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+def read_pdf(path: str, max_bytes: int) -> bytes | None:
+    """Check that a file looks like a PDF and read it if it is not larger
+    than ``max_bytes`` (None for larger files, which are opened from disk).
+
+    Runs in prefetch threads, so it must not touch PyMuPDF.
+    """
+    with open(path, "rb") as f:
+        head = f.read(1024)
+        if b"%PDF-" not in head:
+            raise ValueError(f"Keine PDF-Datei: {Path(path).name}")
+        if os.fstat(f.fileno()).st_size > max_bytes:
+            return None
+        return head + f.read()
+
+
+# Streams with these filters are hashed as stored; decoding them would cost
+# a full image decode, and re-encoded copies differ anyway
+IMAGE_FILTERS = ("DCTDecode", "JPXDecode", "JBIG2Decode", "CCITTFaxDecode")
+# Dictionary keys that describe the stored encoding, not the content
+ENCODING_KEYS = {"Length", "Filter", "DecodeParms"}
+REF = re.compile(rb"(\d+) 0 R\b")
 
 
 class PDFMerger:
     """Merge multiple PDF files into one."""
 
+    PREFETCH_FILES = 4  # inputs read ahead (and open) at the same time
+    PREFETCH_MAX_BYTES = 16 * 1024 * 1024  # larger inputs are not preloaded
+    CHUNK_BYTES = 64 * 1024 * 1024  # input bytes between flushes to disk
+
     def __init__(self):
         self.files: list[str] = []
 
@@ -22,16 +57,212 @@ class PDFMerger:
     def clear(self):
         self.files.clear()
 
-    def merge(self, output_path: str) -> int:
-        if len(self.files) < 2:
+    def merge(self, output_path: str, progress=None,
+              stats: dict | None = None, dedup: bool = False) -> int:
+        """Merge all files into ``output_path`` and return the page count.
+
+        Background threads read the next PREFETCH_FILES inputs while the
+        current one is inserted (files above PREFETCH_MAX_BYTES are only
+        checked and then opened from disk); PyMuPDF itself only runs on
+        the calling thread. After every CHUNK_BYTES of input the result is
+        flushed to ``output_path`` + ".part" and reopened, so memory does
+        not grow with the number of inputs. ``progress(files_done, files_total,
+        pages)`` is called after each file. If ``stats`` is given, it
+        receives pages, bytes, seconds, pages_per_s and mb_per_s.
+
+        With ``dedup`` fonts, images and other shared resources that occur
+        in several inputs are stored once (see ``deduplicate``); ``stats``
+        then also receives dedup_objects and dedup_bytes. A flushed merge
+        is always deduplicated, because its final save cannot merge
+        identical streams itself.
+
+        The file list is copied first, so changing it while ``progress``
+        runs the event loop does not affect this merge.
+        """
+        files = list(self.files)
+        if len(files) < 2:
             raise ValueError("Mindestens 2 PDFs zum Zusammenfuegen noetig")
+        start = time.perf_counter()
+        part_path = output_path + ".part"
         result = fitz.open()
         total_pages = 0
-        for path in self.files:
-            doc = fitz.open(path)
-            result.insert_pdf(doc)
-            total_pages += doc.page_count
-            doc.close()
-        result.save(output_path, garbage=4, deflate=True)
-        result.close()
+        total_bytes = 0
+        unflushed = 0
+        flushed = False
+        try:
+            with ThreadPoolExecutor(self.PREFETCH_FILES) as pool:
+                for done, (path, data) in enumerate(
+                        self._prefetch(pool, files), 1):
+                    if data is None:
+                        doc = fitz.open(path)
+                        size = os.path.getsize(path)
+                    else:
+                        doc = fitz.open(stream=data, filetype="pdf")
+                        size = len(data)
+                    if doc.needs_pass:
+                        doc.close()
+                        raise ValueError(
+                            f"Passwortgeschuetzt: {Path(path).name}")
+                    result.insert_pdf(doc)
+                    total_pages += doc.page_count
+                    total_bytes += size
+                    unflushed += size
+                    doc.close()
+                    del data
+                    if unflushed >= self.CHUNK_BYTES:
+                        result = self._flush(result, part_path, flushed)
+                        flushed = True
+                        unflushed = 0
+                    if progress:
+                        progress(done, len(files), total_pages)
+            if dedup or flushed:
+                removed, saved = self.deduplicate(result)
+                if stats is not None and dedup:
+                    stats.update(dedup_objects=removed, dedup_bytes=saved)
+            # garbage=4 also merges byte-identical streams, but on a
+            # document backed by the .part file it compares them by
+            # re-reading from disk, which takes minutes for large merges.
+            # deduplicate() has done that work already.
+            result.save(output_path, garbage=3 if flushed or dedup else 4,
+                        deflate=True)
+        finally:
+            result.close()
+            Path(part_path).unlink(missing_ok=True)
+
+        if stats is not None:
+            seconds = max(time.perf_counter() - start, 1e-9)
+            stats.update(pages=total_pages, bytes=total_bytes,
+                         seconds=seconds,
+                         pages_per_s=total_pages / seconds,
+                         mb_per_s=total_bytes / (1024 * 1024) / seconds)
         return total_pages
+
+    def _prefetch(self, pool: ThreadPoolExecutor, files: list[str]):
+        """Yield (path, data) in file order, keeping PREFETCH_FILES reads
+        in flight."""
+        paths = iter(files)
+        futures = deque()
+        for path in paths:
+            futures.append((path, pool.submit(
+                read_pdf, path, self.PREFETCH_MAX_BYTES)))
+            if len(futures) >= self.PREFETCH_FILES:
+                break
+        while futures:
+            path, future = futures.popleft()
+            data = future.result()
+            next_path = next(paths, None)
+            if next_path is not None:
+                futures.append((next_path, pool.submit(
+                    read_pdf, next_path, self.PREFETCH_MAX_BYTES)))
+            yield path, data
+
+    @staticmethod
+    def deduplicate(doc: fitz.Document) -> tuple[int, int]:
+        """Point all references to duplicate resource streams at one copy.
+
+        Every stream is fingerprinted by its decoded
+        data (stored data for IMAGE_FILTERS) and its dictionary, with
+        references replaced by the fingerprint of the referenced object
+        (the page tree is not followed). So an image whose colour space
+        or SMask is a duplicate matches too, and a font counts as a
+        duplicate however each input compressed it. The copies become
+        unreferenced and are dropped by the next garbage collecting save,
+        which then also merges the identical font and image dictionaries
+        that referred to them.
+
+        Returns the number of duplicate streams and the output bytes
+        saved. Copies stored byte for byte like an earlier one are not
+        counted as saved, since a ``garbage=4`` save would merge them
+        anyway.
+        """
+        streams = [xref for xref in range(1, doc.xref_length())
+                   if doc.xref_is_stream(xref)]
+        keys = {}
+
+        def fingerprint(xref: int, seen: frozenset = frozenset()) -> str:
+            if xref in keys:
+                return keys[xref]
+            if xref in seen:  # reference cycle
+                return f"xref {xref}"
+            seen = seen | {xref}
+
+            def resolve(match: re.Match) -> bytes:
+                return fingerprint(int(match[1]), seen).encode()
+
+            h = hashlib.blake2b(digest_size=16)
+            if not doc.xref_is_stream(xref):
+                text = doc.xref_object(xref, compressed=True)
+                if re.search(r"/Type\s*/Page", text):
+                    return f"xref {xref}"  # do not climb the page tree
+                h.update(REF.sub(resolve, text.encode()))
+                keys[xref] = h.hexdigest()
+                return keys[xref]
+            filter_ = doc.xref_get_key(xref, "Filter")[1]
+            if any(name in filter_ for name in IMAGE_FILTERS):
+                h.update(filter_.encode())
+                h.update(doc.xref_get_key(xref, "DecodeParms")[1].encode())
+                h.update(doc.xref_stream_raw(xref))
+            else:
+                h.update(doc.xref_stream(xref))
+            for key in doc.xref_get_keys(xref):
+                if key in ENCODING_KEYS:
+                    continue
+                value = doc.xref_get_key(xref, key)[1].encode()
+                h.update(b"/" + key.encode() + b" " + REF.sub(resolve, value)
+                         + b"\n")
+            keys[xref] = h.hexdigest()
+            return keys[xref]
+
+        canonical = {}
+        duplicates = {}  # xref -> xref of the copy that is kept
+        stored = set()  # (fingerprint, hash of the stored bytes)
+        saved = 0
+        for xref in streams:
+            try:
+                key = fingerprint(xref)
+            except Exception:
+                continue  # damaged stream, leave it alone
+            raw = doc.xref_stream_raw(xref)
+            copy = (key, hashlib.blake2b(raw, digest_size=16).digest())
+            if key in canonical:
+                duplicates[xref] = canonical[key]
+                if copy not in stored:
+                    if doc.xref_get_key(xref, "Filter")[0] == "null":
+                        raw = zlib.compress(raw)  # as the deflating save would
+                    saved += len(raw)
+            else:
+                canonical[key] = xref
+            stored.add(copy)
+        if not duplicates:
+            return 0, 0
+
+        def replace(match: re.Match) -> bytes:
+            target = duplicates.get(int(match[1]))
+            return b"%d 0 R" % target if target else match[0]
+
+        for xref in range(1, doc.xref_length()):
+            if xref in duplicates:
+                continue
+            text = doc.xref_object(xref, compressed=True).encode()
+            if not any(int(m[1]) in duplicates for m in REF.finditer(text)):
+                continue
+            if not doc.xref_is_stream(xref):
+                doc.update_object(xref, REF.sub(replace, text).decode())
+                continue
+            for key in doc.xref_get_keys(xref):
+                kind, value = doc.xref_get_key(xref, key)
+                new_value = REF.sub(replace, value.encode()).decode()
+                if new_value != value:
+                    doc.xref_set_key(xref, key, new_value)
+        return len(duplicates), saved
+
+    @staticmethod
+    def _flush(result: fitz.Document, part_path: str,
+               incremental: bool) -> fitz.Document:
+        """Write the pages inserted so far to disk and reopen the file."""
+        if incremental:
+            result.saveIncr()
+        else:
+            result.save(part_path)
+        result.close()
+        return fitz.open(part_path)
@@ -1,27 +1,256 @@
 import fitz
+import os
+import re
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 
+REF = re.compile(r"(\d+) 0 R\b")
+# Keys pointing back up or across the page tree
+BACK_REFS = re.compile(r"/(Parent|P|Dest|D|First|Last|Next|Prev)\s+\d+ 0 R")
+# Characters not allowed in file names on Windows
+UNSAFE_NAME = re.compile(r'[<>:"/\\|?*\x00-\x1f]+')
+
+
+def _split_pages(job: tuple[str, str, int, int]) -> list[str]:
+    """Save pages ``start`` to ``end`` - 1 as single-page files.
+
+    Process pool entry point: each worker opens the source once for its
+    whole slice.
+    """
+    input_path, output_dir, start, end = job
+    doc = fitz.open(input_path)
+    stem = Path(input_path).stem
+    out = Path(output_dir)
+    files = []
+    for i in range(start, end):
+        new_doc = fitz.open()
+        new_doc.insert_pdf(doc, from_page=i, to_page=i)
+        path = str(out / f"{stem}_Seite_{i + 1}.pdf")
+        new_doc.save(path, garbage=4, deflate=True)
+        new_doc.close()
+        files.append(path)
+    doc.close()
+    return files
+
+
 class PDFSplitter:
     """Split PDF files into parts."""
 
+    MIN_SLICE_PAGES = 100  # fewer pages per worker do not pay for the start
+
+    @staticmethod
+    def split_all_pages(input_path: str, output_dir: str,
+                        workers: int = 1) -> list[str]:
+        """Save every page as its own file.
+
+        With ``workers`` > 1 the pages are split into one contiguous
+        slice per worker process; file names and contents are the same
+        as with a single worker.
+        """
+        with fitz.open(input_path) as doc:
+            page_count = doc.page_count
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        workers = max(1, min(workers,
+                             page_count // PDFSplitter.MIN_SLICE_PAGES))
+        bounds = [page_count * i // workers for i in range(workers + 1)]
+        jobs = [(input_path, output_dir, start, end)
+                for start, end in zip(bounds, bounds[1:])]
+        if workers == 1:
+            return _split_pages(jobs[0])
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return [path for files in pool.map(_split_pages, jobs)
+                    for path in files]
+
+    PART_OVERHEAD = 2048  # catalog, page tree, xref table of a part
+    MAX_SIZE_CORRECTIONS = 3
+
     @staticmethod
-    def split_all_pages(input_path: str, output_dir: str) -> list[str]:
+    def split_by_size(input_path: str, output_dir: str,
+                      max_bytes: int) -> list[str]:
+        """Split into consecutive parts of at most ``max_bytes`` each.
+
+        Each page's share is estimated from the objects it references
+        (content streams, images, fonts), counting objects that pages of
+        the same part share once, and pages are packed greedily. Every
+        part is saved once; if one comes out too large it is packed
+        again with the estimate scaled by the observed error, at most
+        MAX_SIZE_CORRECTIONS times overall. A single page larger than
+        ``max_bytes`` becomes a part of its own.
+        """
         doc = fitz.open(input_path)
         stem = Path(input_path).stem
         out = Path(output_dir)
         out.mkdir(parents=True, exist_ok=True)
+        objects = {}  # xref -> (bytes, referenced xrefs)
+        page_xrefs = {doc.page_xref(pno) for pno in range(doc.page_count)}
+        pages = [PDFSplitter._page_objects(doc, pno, objects, page_xrefs)
+                 for pno in range(doc.page_count)]
+
         files = []
-        for i in range(doc.page_count):
+        factor = 1.0  # real bytes per estimated byte
+        corrections = 0
+        start = 0
+        while start < doc.page_count:
+            end, estimate = PDFSplitter._pack(pages, objects, start,
+                                              max_bytes / factor)
+            path = str(out / f"{stem}_Teil_{len(files) + 1}.pdf")
             new_doc = fitz.open()
-            new_doc.insert_pdf(doc, from_page=i, to_page=i)
-            path = str(out / f"{stem}_Seite_{i + 1}.pdf")
+            new_doc.insert_pdf(doc, from_page=start, to_page=end - 1)
             new_doc.save(path, garbage=4, deflate=True)
             new_doc.close()
+            size = os.path.getsize(path)
+            if (size > max_bytes and end - start > 1
+                    and corrections < PDFSplitter.MAX_SIZE_CORRECTIONS):
+                corrections += 1
+                factor = max(factor, size / estimate) * 1.02
+                continue  # pack the same pages again, tighter
             files.append(path)
+            start = end
         doc.close()
         return files
 
+    @staticmethod
+    def _page_objects(doc: fitz.Document, pno: int, objects: dict,
+                      page_xrefs: set[int]) -> set[int]:
+        """All xrefs reachable from a page without leaving it through the
+        page tree, links or outlines; other pages (``page_xrefs``, e.g.
+        link targets) are not followed. ``objects`` caches the size and
+        direct references of each object."""
+        page_xref = doc.page_xref(pno)
+        seen = {page_xref}
+        todo = [page_xref]
+        while todo:
+            xref = todo.pop()
+            if xref not in objects:
+                text = doc.xref_object(xref, compressed=True)
+                size = len(text)
+                if doc.xref_is_stream(xref):
+                    raw = doc.xref_stream_raw(xref)
+                    if doc.xref_get_key(xref, "Filter")[0] == "null":
+                        raw = zlib.compress(raw, 1)  # saved with deflate
+                    size += len(raw)
+                refs = {int(ref) for ref in
+                        REF.findall(BACK_REFS.sub("", text))}
+                objects[xref] = (size, refs)
+            for ref in objects[xref][1]:
+                if (ref not in seen and ref not in page_xrefs
+                        and 0 < ref < doc.xref_length()):
+                    seen.add(ref)
+                    todo.append(ref)
+        return seen
+
+    @staticmethod
+    def _pack(pages: list[set[int]], objects: dict, start: int,
+              budget: float) -> tuple[int, int]:
+        """Take pages from ``start`` while the estimated part size stays
+        within ``budget`` (at least one page); returns the end index and
+        the estimate."""
+        used = set()
+        estimate = PDFSplitter.PART_OVERHEAD
+        end = start
+        while end < len(pages):
+            new = pages[end] - used
+            added = sum(objects[xref][0] for xref in new)
+            if end > start and estimate + added > budget:
+                break
+            used |= new
+            estimate += added
+            end += 1
+        return end, estimate
+
+    FRONT_MATTER = "Vorspann"  # title for pages before the first chapter
+    MAX_TITLE_CHARS = 80
+
+    @staticmethod
+    def outline_ranges(toc: list, level: int,
+                       page_count: int) -> list[tuple[str, int, int]]:
+        """Turn the outline entries up to ``level`` into consecutive
+        ``(title, start, end)`` ranges (0-based, inclusive).
+
+        Entries without a target page or pointing before the previous
+        one are skipped; of several entries on the same page the last
+        (deepest) one names the part.
+        """
+        starts = []  # (page, title)
+        for lvl, title, page, *_ in toc:
+            if lvl > level or not 1 <= page <= page_count:
+                continue
+            if starts and page - 1 < starts[-1][0]:
+                continue
+            if starts and page - 1 == starts[-1][0]:
+                starts.pop()
+            starts.append((page - 1, title.strip()))
+        if not starts:
+            return []
+        if starts[0][0] > 0:
+            starts.insert(0, (0, PDFSplitter.FRONT_MATTER))
+        ends = [page - 1 for page, _ in starts[1:]] + [page_count - 1]
+        return [(title, start, end)
+                for (start, title), end in zip(starts, ends)]
+
+    @staticmethod
+    def split_by_outline(input_path: str, output_dir: str,
+                         level: int = 1) -> list[str]:
+        """Split at the bookmarks of outline ``level`` (and above).
+
+        All parts are written while the source is open once. Each part
+        keeps the bookmarks pointing into its pages and is named after
+        its chapter title.
+        """
+        doc = fitz.open(input_path)
+        toc = doc.get_toc(simple=False)
+        ranges = PDFSplitter.outline_ranges(toc, level, doc.page_count)
+        if not ranges:
+            doc.close()
+            raise ValueError("Die PDF enthaelt keine passenden Lesezeichen")
+        out = Path(output_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        width = len(str(len(ranges)))
+        files = []
+        for idx, (title, start, end) in enumerate(ranges, 1):
+            new_doc = fitz.open()
+            new_doc.insert_pdf(doc, from_page=start, to_page=end)
+            new_doc.set_toc(PDFSplitter._part_toc(toc, start, end))
+            name = PDFSplitter._safe_name(title) or f"Teil_{idx}"
+            path = str(out / f"{idx:0{width}d}_{name}.pdf")
+            new_doc.save(path, garbage=4, deflate=True)
+            new_doc.close()
+            files.append(path)
+        doc.close()
+        return files
+
+    @staticmethod
+    def _part_toc(toc: list, start: int, end: int) -> list:
+        """Outline entries targeting pages ``start``..``end``, renumbered
+        for the part and re-levelled so the outline stays valid. Only
+        direct page destinations keep their target position."""
+        items = []
+        for lvl, title, page, *dest in toc:
+            if not start <= page - 1 <= end:
+                continue
+            item = [lvl, title, page - start]
+            if dest and dest[0].get("kind") == fitz.LINK_GOTO:
+                item.append({key: value for key, value in dest[0].items()
+                             if key not in ("xref", "page")})
+            # other kinds (named destinations) would point nowhere in the
+            # part, so they become plain jumps to the page
+            items.append(item)
+        if not items:
+            return []
+        shift = min(item[0] for item in items) - 1
+        previous = 0
+        for item in items:
+            item[0] = min(item[0] - shift, previous + 1)
+            previous = item[0]
+        return items
+
+    @staticmethod
+    def _safe_name(title: str) -> str:
+        name = UNSAFE_NAME.sub("_", title).strip(" ._")
+        return name[:PDFSplitter.MAX_TITLE_CHARS].rstrip(" ._")
+
     @staticmethod
     def split_at_ranges(input_path: str, output_dir: str,
                         ranges: list[tuple[int, int]]) -> list[str]:
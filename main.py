@@ -1,4 +1,5 @@
 import sys
+import multiprocessing
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import Qt
 
@@ -72,4 +73,5 @@ def main():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # worker processes in the frozen exe
     main()
@@ -0,0 +1,83 @@
+"""Micro-benchmark: page render to a painted QImage, old copy path vs.
+ui.pixmap_utils.
+
+    python tools/bench_qimage.py [file.pdf] [--scale 4] [--runs 20]
+
+Without a file a generated A4 text page is used. Reports milliseconds per
+render and the Python heap peak (tracemalloc) of both paths.
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import fitz
+from PyQt6.QtGui import QGuiApplication, QImage, QPainter, QPixmap
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ui.pixmap_utils import render_qimage  # noqa: E402
+
+
+def old_render(page: fitz.Page, scale: float) -> QPixmap:
+    pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False)
+    img = QImage(pix.samples, pix.width, pix.height, pix.stride,
+                 QImage.Format.Format_RGB888)
+    return QPixmap.fromImage(img)
+
+
+def new_render(page: fitz.Page, scale: float) -> QImage:
+    return render_qimage(page, scale)
+
+
+def measure(render, page: fitz.Page, scale: float, runs: int):
+    target = None
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(runs):
+        image = render(page, scale)
+        if target is None:
+            target = QImage(image.width(), image.height(),
+                            QImage.Format.Format_RGB32)
+        painter = QPainter(target)
+        if isinstance(image, QPixmap):
+            painter.drawPixmap(0, 0, image)
+        else:
+            painter.fillRect(target.rect(), 0xFFFFFF)
+            painter.drawImage(0, 0, image)
+        painter.end()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds / runs * 1000, peak / (1024 * 1024)
+
+
+def sample_page() -> fitz.Page:
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=842)
+    text = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 2
+    for y in range(50, 800, 14):
+        page.insert_text((40, y), text, fontsize=9)
+    return page
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pdf", nargs="?")
+    parser.add_argument("--scale", type=float, default=4.0)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    app = QGuiApplication(sys.argv)  # QPixmap needs one
+    doc = fitz.open(args.pdf) if args.pdf else None
+    page = doc[0] if doc else sample_page()
+    rect = page.rect * args.scale
+    print(f"{rect.width:.0f}x{rect.height:.0f} px, {args.runs} renders "
+          f"({app.platformName()})")
+    for name, render in (("old", old_render), ("new", new_render)):
+        ms, peak = measure(render, page, args.scale, args.runs)
+        print(f"  {name}: {ms:.1f} ms/render, {peak:.1f} MB Python peak")
+
+
+if __name__ == "__main__":
+    main()
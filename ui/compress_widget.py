@@ -1,19 +1,25 @@
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
                               QLabel, QComboBox, QFileDialog, QMessageBox,
                               QProgressBar, QGroupBox, QRadioButton,
-                              QButtonGroup)
-from PyQt6.QtCore import Qt
+                              QButtonGroup, QDoubleSpinBox)
+from PyQt6.QtCore import Qt, QTimer
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import os
 
-from core.pdf_compressor import PDFCompressor
+from core.pdf_compressor import PDFCompressor, DPI_OPTIONS, AUTO_QUALITY
 
 
 class CompressDialog(QDialog):
     """Dialog for PDF compression."""
 
-    def __init__(self, input_path: str = None, parent=None):
+    ESTIMATE_DELAY_MS = 300  # let the dialog paint and DPI changes settle
+    ESTIMATE_POLL_MS = 100
+
+    def __init__(self, input_path: str = None, image_cache=None, parent=None):
         super().__init__(parent)
         self.input_path = input_path
+        self.image_cache = image_cache
         self.setWindowTitle("PDF komprimieren")
         self.setMinimumWidth(450)
         self._setup_ui()
@@ -38,6 +44,9 @@ class CompressDialog(QDialog):
         else:
             self.size_label = QLabel("")
         layout.addWidget(self.size_label)
+        self.estimate_label = QLabel("")
+        self.estimate_label.setWordWrap(True)
+        layout.addWidget(self.estimate_label)
 
         # Quality selection
         quality_group = QGroupBox("Komprimierungsstufe")
@@ -45,15 +54,41 @@ class CompressDialog(QDialog):
 
         self.radio_simple = QRadioButton(
             "Nur aufraumen (Garbage Collection + Deflate)")
+        self.radio_deep = QRadioButton(
+            "Tiefenreinigung (Schrift-Subsets, Metadaten, Objektstreams)")
         self.radio_low = QRadioButton("Niedrig (starke Komprimierung, Qualitaetsverlust)")
         self.radio_mid = QRadioButton("Mittel (guter Kompromiss)")
         self.radio_mid.setChecked(True)
         self.radio_high = QRadioButton("Hoch (wenig Komprimierung, gute Qualitaet)")
+        self.radio_auto = QRadioButton(
+            "Automatisch (Qualitaet je Bild per Bildvergleich)")
 
         q_layout.addWidget(self.radio_simple)
+        q_layout.addWidget(self.radio_deep)
         q_layout.addWidget(self.radio_low)
         q_layout.addWidget(self.radio_mid)
         q_layout.addWidget(self.radio_high)
+        q_layout.addWidget(self.radio_auto)
+
+        size_row = QHBoxLayout()
+        self.radio_size = QRadioButton("Zielgroesse (z.B. fuer E-Mail):")
+        self.size_spin = QDoubleSpinBox()
+        self.size_spin.setRange(0.1, 10000)
+        self.size_spin.setDecimals(1)
+        self.size_spin.setValue(10)
+        self.size_spin.setSuffix(" MB")
+        size_row.addWidget(self.radio_size)
+        size_row.addWidget(self.size_spin, 1)
+        q_layout.addLayout(size_row)
+
+        dpi_row = QHBoxLayout()
+        dpi_row.addWidget(QLabel("Bildaufloesung:"))
+        self.dpi_combo = QComboBox()
+        self.dpi_combo.addItem("Unveraendert", None)
+        for dpi in DPI_OPTIONS:
+            self.dpi_combo.addItem(f"Max. {dpi} dpi", dpi)
+        dpi_row.addWidget(self.dpi_combo, 1)
+        q_layout.addLayout(dpi_row)
         layout.addWidget(quality_group)
 
         # Result
@@ -75,6 +110,61 @@ class CompressDialog(QDialog):
         btn_row.addWidget(self.btn_close)
         layout.addLayout(btn_row)
 
+        self._estimate_timer = QTimer(self)
+        self._estimate_timer.setSingleShot(True)
+        self._estimate_timer.setInterval(self.ESTIMATE_DELAY_MS)
+        self._estimate_timer.timeout.connect(self._update_estimate)
+        # analyze() runs in a worker process so the dialog stays responsive
+        self._estimate_pool = None
+        self._estimate_future = None
+        self._estimate_poll = QTimer(self)
+        self._estimate_poll.setInterval(self.ESTIMATE_POLL_MS)
+        self._estimate_poll.timeout.connect(self._show_estimate)
+        self.dpi_combo.currentIndexChanged.connect(self._schedule_estimate)
+        self._schedule_estimate()
+
+    def _schedule_estimate(self):
+        if self.input_path:
+            self.estimate_label.setText("Groesse wird geschaetzt...")
+            self._estimate_timer.start()
+        else:
+            self.estimate_label.setText("")
+
+    def _update_estimate(self):
+        """Start the dry run that projects the size of each preset (no
+        file written); a result still pending for an older file or DPI
+        setting is dropped."""
+        if not self.input_path:
+            self.estimate_label.setText("")
+            return
+        if self._estimate_pool is None:
+            self._estimate_pool = ProcessPoolExecutor(max_workers=1)
+        self._estimate_future = self._estimate_pool.submit(
+            PDFCompressor.analyze, self.input_path,
+            self.dpi_combo.currentData())
+        self._estimate_poll.start()
+
+    def _show_estimate(self):
+        future = self._estimate_future
+        if future is None or not future.done():
+            return
+        self._estimate_poll.stop()
+        self._estimate_future = None
+        try:
+            analysis = future.result()
+        except Exception:
+            self.estimate_label.setText("")
+            return
+        if not analysis["images"]:
+            self.estimate_label.setText("Keine Bilder - nur Aufraeumen sinnvoll")
+            return
+        projected = analysis["projected"]
+        self.estimate_label.setText(
+            f"{len(analysis['images'])} Bilder. Erwartet: "
+            f"Niedrig ~{self._fmt(projected['niedrig'])}, "
+            f"Mittel ~{self._fmt(projected['mittel'])}, "
+            f"Hoch ~{self._fmt(projected['hoch'])}")
+
     def _select_file(self):
         path, _ = QFileDialog.getOpenFileName(
             self, "PDF auswaehlen", "", "PDF (*.pdf)")
@@ -83,6 +173,7 @@ class CompressDialog(QDialog):
             self.file_label.setText(Path(path).name)
             size = Path(path).stat().st_size
             self.size_label.setText(f"Aktuelle Groesse: {self._fmt(size)}")
+            self._schedule_estimate()
 
     def _do_compress(self):
         if not self.input_path:
@@ -101,34 +192,86 @@ class CompressDialog(QDialog):
             self.btn_compress.setEnabled(False)
             self.btn_compress.setText("Komprimiere...")
 
+            details = ""
             if self.radio_simple.isChecked():
                 old, new = PDFCompressor.simple_compress(self.input_path, path)
+            elif self.radio_deep.isChecked():
+                stats = {}
+                old, new = PDFCompressor.deep_clean(self.input_path, path,
+                                                    stats)
+                details = self._breakdown(stats["before"], stats["after"])
+            elif self.radio_size.isChecked():
+                max_bytes = int(self.size_spin.value() * 1024 * 1024)
+                old, new = PDFCompressor.compress_to_size(
+                    self.input_path, path, max_bytes,
+                    workers=os.cpu_count() or 1, cache=self.image_cache)
+                if new > max_bytes:
+                    QMessageBox.warning(
+                        self, "Zielgroesse nicht erreicht",
+                        f"Kleinste erreichbare Groesse: {self._fmt(new)}")
             else:
                 quality = "mittel"
                 if self.radio_low.isChecked():
                     quality = "niedrig"
                 elif self.radio_high.isChecked():
                     quality = "hoch"
+                elif self.radio_auto.isChecked():
+                    quality = AUTO_QUALITY
+                stats = {}
                 old, new = PDFCompressor.compress(
-                    self.input_path, path, quality)
+                    self.input_path, path, quality,
+                    workers=os.cpu_count() or 1,
+                    target_dpi=self.dpi_combo.currentData(), stats=stats,
+                    cache=self.image_cache,
+                    low_memory=Path(self.input_path).stat().st_size
+                    >= PDFCompressor.LOW_MEMORY_SIZE)
+                qualities = stats["qualities"].values()
+                if quality == AUTO_QUALITY and qualities:
+                    details = (f"\n{len(qualities)} Bilder, JPEG-Qualitaet "
+                               f"{min(qualities)}-{max(qualities)}")
+                if stats["lossless"]:
+                    details += (f"\n{len(stats['lossless'])} Scans verlustfrei "
+                                f"in Graustufen/Schwarzweiss")
+                looked_up = stats.get("cache_hits", 0) + stats.get(
+                    "cache_misses", 0)
+                if looked_up:
+                    details += (f"\nBild-Cache: {stats['cache_hits']} von "
+                                f"{looked_up} Bildern wiederverwendet")
 
             saved = old - new
             pct = (saved / old * 100) if old > 0 else 0
             self.result_label.setText(
                 f"Vorher: {self._fmt(old)}  →  Nachher: {self._fmt(new)}\n"
-                f"Gespart: {self._fmt(saved)} ({pct:.1f}%)")
+                f"Gespart: {self._fmt(saved)} ({pct:.1f}%){details}")
             QMessageBox.information(
                 self, "Fertig",
                 f"PDF komprimiert!\n"
                 f"Vorher: {self._fmt(old)}\n"
                 f"Nachher: {self._fmt(new)}\n"
-                f"Gespart: {self._fmt(saved)} ({pct:.1f}%)")
+                f"Gespart: {self._fmt(saved)} ({pct:.1f}%){details}")
         except Exception as e:
             QMessageBox.critical(self, "Fehler", str(e))
         finally:
             self.btn_compress.setEnabled(True)
             self.btn_compress.setText("Komprimieren")
 
+    def done(self, result: int):
+        self._estimate_poll.stop()
+        self._estimate_timer.stop()
+        if self._estimate_pool is not None:
+            self._estimate_pool.shutdown(wait=False, cancel_futures=True)
+            self._estimate_pool = None
+        super().done(result)
+
+    CATEGORIES = {"images": "Bilder", "fonts": "Schriften",
+                  "content": "Seiteninhalt", "other": "Sonstiges"}
+
+    def _breakdown(self, before: dict, after: dict) -> str:
+        lines = [f"{label}: {self._fmt(before[key])}  →  "
+                 f"{self._fmt(after[key])}"
+                 for key, label in self.CATEGORIES.items()]
+        return "\n" + "\n".join(lines)
+
     @staticmethod
     def _fmt(size_bytes: int) -> str:
         if size_bytes < 1024:
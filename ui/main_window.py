@@ -2,11 +2,13 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                               QTabWidget, QMenuBar, QStatusBar, QFileDialog,
                               QMessageBox, QSplitter, QToolBar, QPushButton,
                               QInputDialog)
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QStandardPaths
 from PyQt6.QtGui import QAction, QKeySequence
 from pathlib import Path
 
 from core.pdf_handler import PDFHandler
+from core.disk_cache import DiskCache, file_fingerprint
+from ui.render_cache import RenderCache
 from ui.viewer_widget import ViewerWidget
 from ui.thumbnail_bar import ThumbnailBar
 from ui.edit_toolbar import EditToolbar
@@ -22,6 +24,14 @@ class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.handler = PDFHandler()
+        self.render_cache = RenderCache(max_bytes=256 * 1024 * 1024)
+        cache_dir = QStandardPaths.writableLocation(
+            QStandardPaths.StandardLocation.CacheLocation)
+        self.thumbnail_store = DiskCache(str(Path(cache_dir) / "thumbnails"),
+                                         max_bytes=200 * 1024 * 1024)
+        self.image_cache = DiskCache(str(Path(cache_dir) / "images"),
+                                     max_bytes=500 * 1024 * 1024)
+        self.handler.add_listener(self._on_document_changed)
         self.setWindowTitle("PDF Tool")
         self.setMinimumSize(1000, 700)
         self.resize(1200, 800)
@@ -144,8 +154,11 @@ class MainWindow(QMainWindow):
 
         self.splitter = QSplitter(Qt.Orientation.Horizontal)
 
-        self.thumbnail_bar = ThumbnailBar()
-        self.viewer = ViewerWidget()
+        self.thumbnail_bar = ThumbnailBar(self.render_cache,
+                                          self.thumbnail_store,
+                                          self.handler.get_display_list)
+        self.viewer = ViewerWidget(self.render_cache,
+                                   self.handler.get_display_list)
 
         self.thumbnail_bar.page_selected.connect(self.viewer.go_to_page)
         self.viewer.page_changed.connect(self.thumbnail_bar.select_page)
@@ -194,6 +207,28 @@ class MainWindow(QMainWindow):
             self.status.showMessage("Bereit")
             self.setWindowTitle("PDF Tool")
 
+    def _on_document_changed(self, event, *args):
+        """Patch the thumbnails after a page edit instead of rebuilding."""
+        doc = self.handler.doc
+        if event == "page_changed":
+            index = args[0]
+            self.render_cache.invalidate_page(doc.page_xref(index))
+            self.thumbnail_bar.update_page(index)
+        elif event == "pages_inserted":
+            index, count = args
+            for i in range(index, index + count):
+                self.render_cache.invalidate_page(doc.page_xref(i))
+            self.thumbnail_bar.insert_pages(index, count)
+        elif event == "pages_removed":
+            self.thumbnail_bar.remove_pages(*args)
+        elif event == "page_moved":
+            self.thumbnail_bar.move_page(*args)
+        elif event == "saved":
+            if args[0]:
+                self.render_cache.clear()  # xrefs were renumbered
+            self.thumbnail_bar.set_fingerprint(
+                file_fingerprint(self.handler.file_path))
+
     def _open_file(self):
         path, _ = QFileDialog.getOpenFileName(
             self, "PDF oeffnen", "", "PDF (*.pdf);;Alle Dateien (*)")
@@ -201,8 +236,9 @@ class MainWindow(QMainWindow):
             return
         try:
             doc = self.handler.open(path)
+            self.render_cache.clear()
             self.viewer.set_document(doc)
-            self.thumbnail_bar.set_document(doc)
+            self.thumbnail_bar.set_document(doc, file_fingerprint(path))
             self._update_status()
         except Exception as e:
             QMessageBox.critical(self, "Fehler", f"Konnte PDF nicht oeffnen:\n{e}")
@@ -257,7 +293,6 @@ class MainWindow(QMainWindow):
     def _rotate_page_at(self, idx, angle):
         self.handler.rotate_page(idx, angle)
         self.viewer.refresh()
-        self.thumbnail_bar.refresh()
         self._update_status()
 
     def _delete_current_page(self):
@@ -280,7 +315,6 @@ class MainWindow(QMainWindow):
         self.viewer.page_spin.setMaximum(max(1, self.handler.page_count()))
         self.viewer.page_label.setText(f"/ {self.handler.page_count()}")
         self.viewer.refresh()
-        self.thumbnail_bar.refresh()
         self._update_status()
 
     def _on_pages_reordered(self, from_idx, to_idx):
@@ -305,7 +339,6 @@ class MainWindow(QMainWindow):
         self.viewer.page_spin.setMaximum(self.handler.page_count())
         self.viewer.page_label.setText(f"/ {self.handler.page_count()}")
         self.viewer.refresh()
-        self.thumbnail_bar.refresh()
         self._update_status()
 
     def _add_text(self):
@@ -314,7 +347,7 @@ class MainWindow(QMainWindow):
             return
         page = self.handler.get_page(self.viewer.current_page)
         if self.edit_toolbar.add_text_to_page(page, self):
-            self.handler.modified = True
+            self.handler.mark_page_changed(self.viewer.current_page)
             self.viewer.refresh()
             self._update_status()
 
@@ -324,7 +357,7 @@ class MainWindow(QMainWindow):
             return
         page = self.handler.get_page(self.viewer.current_page)
         if self.edit_toolbar.add_image_to_page(page, self):
-            self.handler.modified = True
+            self.handler.mark_page_changed(self.viewer.current_page)
             self.viewer.refresh()
             self._update_status()
 
@@ -334,7 +367,7 @@ class MainWindow(QMainWindow):
             return
         page = self.handler.get_page(self.viewer.current_page)
         if self.edit_toolbar.add_comment_to_page(page, self):
-            self.handler.modified = True
+            self.handler.mark_page_changed(self.viewer.current_page)
             self.viewer.refresh()
             self._update_status()
 
@@ -360,7 +393,6 @@ class MainWindow(QMainWindow):
             if result["mode"] == "image" and result["image_path"]:
                 PDFEditor.insert_signature_image(page, rect, result["image_path"])
             else:
-                png_bytes = result["pixmap"]
                 # Convert QPixmap to PNG bytes
                 from PyQt6.QtCore import QBuffer, QIODevice
                 buf = QBuffer()
@@ -369,10 +401,9 @@ class MainWindow(QMainWindow):
                 png_data = bytes(buf.data())
                 buf.close()
                 PDFEditor.insert_signature_bytes(page, rect, png_data)
-            self.handler.modified = True
+            self.handler.mark_page_changed(result["page"])
             self.viewer.go_to_page(result["page"])
             self.viewer.refresh()
-            self.thumbnail_bar.refresh()
             self._update_status()
             QMessageBox.information(self, "Fertig",
                                     f"Unterschrift auf Seite {result['page'] + 1} eingefuegt!")
@@ -382,7 +413,7 @@ class MainWindow(QMainWindow):
 
     def _show_compress(self):
         path = self.handler.file_path
-        dlg = CompressDialog(path, self)
+        dlg = CompressDialog(path, self.image_cache, self)
         dlg.exec()
 
     def closeEvent(self, event):
@@ -1,6 +1,7 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                               QListWidget, QAbstractItemView, QFileDialog,
-                              QMessageBox, QLabel, QProgressBar)
+                              QMessageBox, QLabel, QProgressBar, QApplication,
+                              QCheckBox)
 from PyQt6.QtCore import Qt
 from pathlib import Path
 
@@ -48,6 +49,11 @@ class MergeWidget(QWidget):
         btn_row.addStretch()
         layout.addLayout(btn_row)
 
+        self.chk_dedup = QCheckBox(
+            "Gemeinsame Schriften und Bilder nur einmal speichern")
+        self.chk_dedup.setChecked(True)
+        layout.addWidget(self.chk_dedup)
+
         self.btn_merge = QPushButton("Zusammenfuegen")
         self.btn_merge.setStyleSheet(
             "background-color: #4CAF50; color: white; font-size: 14px; "
@@ -55,6 +61,10 @@ class MergeWidget(QWidget):
         self.btn_merge.clicked.connect(self._do_merge)
         layout.addWidget(self.btn_merge)
 
+        self.progress = QProgressBar()
+        self.progress.setVisible(False)
+        layout.addWidget(self.progress)
+
         self.status_label = QLabel("")
         layout.addWidget(self.status_label)
         layout.addStretch()
@@ -93,12 +103,32 @@ class MergeWidget(QWidget):
             "PDF (*.pdf)")
         if not path:
             return
+        self.progress.setRange(0, len(self.merger.files))
+        self.progress.setValue(0)
+        self.progress.setVisible(True)
+        self.setEnabled(False)  # the list must not change while merging
         try:
-            pages = self.merger.merge(path)
-            self.status_label.setText(
-                f"Erfolgreich! {len(self.merger.files)} Dateien → "
-                f"{pages} Seiten → {Path(path).name}")
+            stats = {}
+            pages = self.merger.merge(path, self._on_progress, stats,
+                                      dedup=self.chk_dedup.isChecked())
+            text = (f"Erfolgreich! {len(self.merger.files)} Dateien → "
+                    f"{pages} Seiten → {Path(path).name}\n"
+                    f"{stats['pages_per_s']:.0f} Seiten/s, "
+                    f"{stats['mb_per_s']:.1f} MB/s")
+            if stats.get("dedup_bytes"):
+                text += (f"\n{stats['dedup_objects']} doppelte Ressourcen "
+                         f"entfernt, {stats['dedup_bytes'] / (1024 * 1024):.1f}"
+                         f" MB gespart")
+            self.status_label.setText(text)
             QMessageBox.information(self, "Fertig",
                                     f"PDF zusammengefuegt!\n{pages} Seiten gespeichert.")
         except Exception as e:
             QMessageBox.critical(self, "Fehler", str(e))
+        finally:
+            self.progress.setVisible(False)
+            self.setEnabled(True)
+
+    def _on_progress(self, done: int, total: int, pages: int):
+        self.progress.setValue(done)
+        self.status_label.setText(f"Datei {done} von {total}, {pages} Seiten")
+        QApplication.processEvents()
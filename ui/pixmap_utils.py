@@ -0,0 +1,37 @@
+from PyQt6.QtGui import QImage
+import fitz
+
+_FORMATS = {
+    (1, 0): QImage.Format.Format_Grayscale8,
+    (3, 0): QImage.Format.Format_RGB888,
+    # MuPDF renders premultiplied alpha
+    (4, 1): QImage.Format.Format_RGBA8888_Premultiplied,
+}
+
+
+def qimage_from_pixmap(pix: fitz.Pixmap) -> QImage:
+    """Wrap a fitz.Pixmap's sample buffer in a QImage without copying.
+
+    The image keeps a reference to ``pix``, so the buffer lives as long as
+    the returned QImage object does. Keep that object (not a C++ copy of
+    it) around while it is painted.
+    """
+    fmt = _FORMATS.get((pix.n, pix.alpha))
+    if fmt is None:
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+        fmt = _FORMATS[(pix.n, pix.alpha)]
+    img = QImage(pix.samples_mv, pix.width, pix.height, pix.stride, fmt)
+    img._pix = pix
+    return img
+
+
+def render_qimage(source: fitz.Page | fitz.DisplayList, scale: float,
+                  clip: fitz.Rect | None = None, alpha: bool = True) -> QImage:
+    """Render a page (region) or its display list straight into a QImage.
+
+    With ``alpha`` the result is RGBA8888_Premultiplied, which QPainter
+    draws without a format conversion; paint a white background first.
+    """
+    pix = source.get_pixmap(matrix=fitz.Matrix(scale, scale), clip=clip,
+                          alpha=alpha)
+    return qimage_from_pixmap(pix)
@@ -0,0 +1,75 @@
+from collections import OrderedDict
+import fitz
+
+
+class RenderCache:
+    """LRU cache of rendered page images, bounded by a byte budget.
+
+    Shared by the viewer and the thumbnail bar. Entries are keyed by page
+    xref, scale, rotation and page revision, so a page keeps its renders
+    when it is moved and loses them once it is edited. A save that
+    renumbers the xrefs has to ``clear`` the cache.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.used_bytes = 0
+        self._items = OrderedDict()  # key -> (value, nbytes)
+        self._page_revisions = {}  # xref -> revision
+
+    def key(self, page: fitz.Page, scale: float, *extra) -> tuple:
+        return (page.xref, round(scale, 4), page.rotation,
+                self._page_revisions.get(page.xref, 0)) + extra
+
+    def get(self, key):
+        entry = self._items.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def peek(self, key):
+        """Look up an entry without counting it or refreshing its age."""
+        entry = self._items.get(key)
+        return entry[0] if entry else None
+
+    def put(self, key, value, nbytes: int):
+        if key in self._items:
+            self.used_bytes -= self._items.pop(key)[1]
+        if nbytes > self.max_bytes:
+            return
+        self._items[key] = (value, nbytes)
+        self.used_bytes += nbytes
+        while self.used_bytes > self.max_bytes:
+            _, (_, size) = self._items.popitem(last=False)
+            self.used_bytes -= size
+
+    def invalidate_page(self, xref: int):
+        """Mark the cached renders of one page as outdated."""
+        self._page_revisions[xref] = self._page_revisions.get(xref, 0) + 1
+
+    def clear(self):
+        self._items.clear()
+        self._page_revisions.clear()
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+
+def pixmap_bytes(pixmap) -> int:
+    """Approximate memory used by a QPixmap or QImage."""
+    return pixmap.width() * pixmap.height() * max(1, pixmap.depth() // 8)
@@ -3,9 +3,8 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
                               QSpinBox, QGroupBox, QFormLayout, QMessageBox,
                               QColorDialog)
 from PyQt6.QtCore import Qt, QPoint, QRect, QSize
-from PyQt6.QtGui import (QPainter, QPen, QColor, QPixmap, QImage,
-                          QPainterPath, QFont)
-import io
+from PyQt6.QtGui import (QPainter, QPen, QColor, QPixmap, QPainterPath,
+                          QFont)
 
 
 class SignatureCanvas(QWidget):
@@ -48,14 +47,11 @@ class SignatureCanvas(QWidget):
 
     def to_bytes(self) -> bytes:
         pixmap = self.to_pixmap()
-        img = pixmap.toImage()
-        buf = io.BytesIO()
-        ba = img.convertToFormat(QImage.Format.Format_ARGB32)
-        # Save via QImage -> PNG bytes
+        # Save via QPixmap -> PNG bytes
         from PyQt6.QtCore import QBuffer, QIODevice
         qbuf = QBuffer()
         qbuf.open(QIODevice.OpenModeFlag.WriteOnly)
-        img.save(qbuf, "PNG")
+        pixmap.save(qbuf, "PNG")
         return bytes(qbuf.data())
 
     def _crop_to_content(self, pixmap: QPixmap) -> QPixmap:
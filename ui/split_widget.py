@@ -1,9 +1,10 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                               QLabel, QFileDialog, QMessageBox, QRadioButton,
                               QButtonGroup, QLineEdit, QSpinBox, QGroupBox,
-                              QFormLayout)
+                              QFormLayout, QDoubleSpinBox)
 from PyQt6.QtCore import Qt
 from pathlib import Path
+import os
 
 from core.pdf_splitter import PDFSplitter
 
@@ -40,11 +41,15 @@ class SplitWidget(QWidget):
         self.radio_all.setChecked(True)
         self.radio_ranges = QRadioButton("An bestimmten Bereichen aufteilen")
         self.radio_extract = QRadioButton("Seitenbereich extrahieren")
+        self.radio_size = QRadioButton("Nach Dateigroesse aufteilen")
+        self.radio_outline = QRadioButton("Nach Lesezeichen (Kapiteln) aufteilen")
 
         self.btn_group = QButtonGroup(self)
         self.btn_group.addButton(self.radio_all, 0)
         self.btn_group.addButton(self.radio_ranges, 1)
         self.btn_group.addButton(self.radio_extract, 2)
+        self.btn_group.addButton(self.radio_size, 3)
+        self.btn_group.addButton(self.radio_outline, 4)
 
         mode_layout.addWidget(self.radio_all)
         mode_layout.addWidget(self.radio_ranges)
@@ -69,6 +74,23 @@ class SplitWidget(QWidget):
         extract_row.addWidget(self.spin_to)
         mode_layout.addLayout(extract_row)
 
+        mode_layout.addWidget(self.radio_size)
+        self.spin_size = QDoubleSpinBox()
+        self.spin_size.setPrefix("Max. pro Teil: ")
+        self.spin_size.setSuffix(" MB")
+        self.spin_size.setRange(0.1, 10000)
+        self.spin_size.setDecimals(1)
+        self.spin_size.setValue(15)
+        self.spin_size.setEnabled(False)
+        mode_layout.addWidget(self.spin_size)
+
+        mode_layout.addWidget(self.radio_outline)
+        self.spin_level = QSpinBox()
+        self.spin_level.setPrefix("Gliederungsebene: ")
+        self.spin_level.setMinimum(1)
+        self.spin_level.setEnabled(False)
+        mode_layout.addWidget(self.spin_level)
+
         layout.addWidget(mode_group)
 
         self.btn_group.idToggled.connect(self._on_mode_changed)
@@ -90,6 +112,8 @@ class SplitWidget(QWidget):
         self.ranges_input.setEnabled(id_ == 1)
         self.spin_from.setEnabled(id_ == 2)
         self.spin_to.setEnabled(id_ == 2)
+        self.spin_size.setEnabled(id_ == 3)
+        self.spin_level.setEnabled(id_ == 4)
 
     def _select_file(self):
         path, _ = QFileDialog.getOpenFileName(
@@ -100,10 +124,12 @@ class SplitWidget(QWidget):
             import fitz
             doc = fitz.open(path)
             pages = doc.page_count
+            levels = max((item[0] for item in doc.get_toc()), default=1)
             doc.close()
             self.spin_from.setMaximum(pages)
             self.spin_to.setMaximum(pages)
             self.spin_to.setValue(pages)
+            self.spin_level.setMaximum(levels)
 
     def _do_split(self):
         if not self.input_path:
@@ -119,7 +145,7 @@ class SplitWidget(QWidget):
         try:
             if mode == 0:
                 files = PDFSplitter.split_all_pages(
-                    self.input_path, output_dir)
+                    self.input_path, output_dir, workers=os.cpu_count() or 1)
                 self.status_label.setText(f"{len(files)} Dateien erstellt")
                 QMessageBox.information(
                     self, "Fertig",
@@ -158,5 +184,38 @@ class SplitWidget(QWidget):
                     self, "Fertig",
                     f"Seiten {s}-{e} extrahiert!")
 
+            elif mode == 3:
+                max_bytes = int(self.spin_size.value() * 1024 * 1024)
+                files = PDFSplitter.split_by_size(
+                    self.input_path, output_dir, max_bytes)
+                import fitz
+                single = multi = 0
+                for f in files:
+                    if os.path.getsize(f) > max_bytes:
+                        with fitz.open(f) as part:
+                            if part.page_count == 1:
+                                single += 1
+                            else:
+                                multi += 1
+                text = f"{len(files)} Dateien erstellt"
+                if single:
+                    text += (f"\n{single} davon groesser als erlaubt "
+                             f"(einzelne Seite zu gross)")
+                if multi:
+                    text += (f"\n{multi} davon groesser als erlaubt "
+                             f"(Groessenschaetzung zu ungenau)")
+                self.status_label.setText(text)
+                QMessageBox.information(
+                    self, "Fertig",
+                    f"PDF in {len(files)} Teile aufgeteilt!")
+
+            elif mode == 4:
+                files = PDFSplitter.split_by_outline(
+                    self.input_path, output_dir, self.spin_level.value())
+                self.status_label.setText(f"{len(files)} Dateien erstellt")
+                QMessageBox.information(
+                    self, "Fertig",
+                    f"PDF in {len(files)} Kapitel aufgeteilt!")
+
         except Exception as e:
             QMessageBox.critical(self, "Fehler", str(e))
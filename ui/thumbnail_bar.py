@@ -1,9 +1,14 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QListWidget,
                               QListWidgetItem, QAbstractItemView, QMenu)
-from PyQt6.QtCore import Qt, pyqtSignal, QSize, QMimeData
-from PyQt6.QtGui import QPixmap, QImage, QIcon, QDrag
+from PyQt6.QtCore import Qt, pyqtSignal, QSize, QMimeData, QTimer, QElapsedTimer
+from PyQt6.QtGui import QPixmap, QIcon, QDrag, QColor
+from bisect import bisect_left
 import fitz
 
+from core.disk_cache import DiskCache
+from ui.render_cache import RenderCache, pixmap_bytes
+from ui.pixmap_utils import qimage_from_pixmap
+
 
 class ThumbnailBar(QWidget):
     """Sidebar showing page thumbnails with drag & drop reorder."""
@@ -13,9 +18,27 @@ class ThumbnailBar(QWidget):
     page_delete_requested = pyqtSignal(int)
     page_rotate_requested = pyqtSignal(int, int)  # index, angle
 
-    def __init__(self, parent=None):
+    PREFETCH_ROWS = 10  # rows rendered ahead of the visible area
+    TIME_SLICE_MS = 15  # max. render time per event loop turn
+    SCALE = 0.2
+
+    def __init__(self, render_cache: RenderCache | None = None,
+                 thumbnail_store: DiskCache | None = None,
+                 display_lists=None, parent=None):
         super().__init__(parent)
+        self.render_cache = (render_cache if render_cache is not None
+                             else RenderCache())
+        self.thumbnail_store = thumbnail_store
+        self.display_lists = display_lists  # page index -> fitz.DisplayList
         self.doc = None
+        self.fingerprint = None  # of the file on disk, for thumbnail_store
+        self._edited_xrefs = set()  # pages that differ from the file
+        self._placeholder = None
+        self._dragging = False
+        self._render_timer = QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.setInterval(0)
+        self._render_timer.timeout.connect(self._render_visible)
         self._setup_ui()
 
     def _setup_ui(self):
@@ -36,27 +59,158 @@ class ThumbnailBar(QWidget):
             Qt.ContextMenuPolicy.CustomContextMenu)
         self.list_widget.customContextMenuRequested.connect(
             self._show_context_menu)
+        self.list_widget.verticalScrollBar().valueChanged.connect(
+            self._schedule_render)
 
         self.setFixedWidth(150)
         layout.addWidget(self.list_widget)
 
-    def set_document(self, doc: fitz.Document):
+    def set_document(self, doc: fitz.Document, fingerprint: str | None = None):
         self.doc = doc
+        self.fingerprint = fingerprint
+        self._edited_xrefs.clear()
         self.refresh()
 
+    def set_fingerprint(self, fingerprint: str | None):
+        """Key the thumbnail store by the file just saved; every page now
+        matches it, and a full save may have renumbered the xrefs."""
+        self.fingerprint = fingerprint
+        self._edited_xrefs.clear()
+
     def refresh(self):
+        """Fill the list with placeholders; images are rendered lazily."""
         self.list_widget.clear()
         if not self.doc:
             return
         for i in range(self.doc.page_count):
-            page = self.doc[i]
-            pix = page.get_pixmap(matrix=fitz.Matrix(0.2, 0.2), alpha=False)
-            img = QImage(pix.samples, pix.width, pix.height,
-                         pix.stride, QImage.Format.Format_RGB888)
-            pixmap = QPixmap.fromImage(img)
-            item = QListWidgetItem(QIcon(pixmap), f"Seite {i + 1}")
-            item.setSizeHint(QSize(130, 140))
-            self.list_widget.addItem(item)
+            self.list_widget.addItem(self._new_item(i))
+        self._schedule_render()
+
+    def update_page(self, index: int):
+        """Re-render one thumbnail; the old image stays until it is ready."""
+        item = self.list_widget.item(index)
+        if item:
+            self._edited_xrefs.add(self.doc.page_xref(index))
+            item.setData(Qt.ItemDataRole.UserRole, False)
+            self._schedule_render()
+
+    def insert_pages(self, index: int, count: int):
+        self._edited_xrefs.update(
+            self.doc.page_xref(i) for i in range(index, index + count))
+        self.list_widget.blockSignals(True)
+        for i in range(index, index + count):
+            self.list_widget.insertItem(i, self._new_item(i))
+        self.list_widget.blockSignals(False)
+        self._relabel(index + count, self.list_widget.count())
+        self._schedule_render()
+
+    def remove_pages(self, index: int, count: int):
+        self.list_widget.blockSignals(True)
+        for _ in range(count):
+            self.list_widget.takeItem(index)
+        self.list_widget.blockSignals(False)
+        self._relabel(index, self.list_widget.count())
+        self._schedule_render()
+
+    def move_page(self, from_idx: int, to_idx: int):
+        if not self._dragging:
+            # drag & drop has already moved the item itself
+            self.list_widget.blockSignals(True)
+            item = self.list_widget.takeItem(from_idx)
+            self.list_widget.insertItem(to_idx, item)
+            self.list_widget.blockSignals(False)
+        self._relabel(min(from_idx, to_idx), max(from_idx, to_idx) + 1)
+        self._schedule_render()
+
+    def _new_item(self, index: int) -> QListWidgetItem:
+        item = QListWidgetItem(self._placeholder_icon(), f"Seite {index + 1}")
+        item.setSizeHint(QSize(130, 140))
+        return item
+
+    def _relabel(self, start: int, end: int):
+        for row in range(start, end):
+            self.list_widget.item(row).setText(f"Seite {row + 1}")
+
+    def _placeholder_icon(self) -> QIcon:
+        if self._placeholder is None:
+            pixmap = QPixmap(119, 168)
+            pixmap.fill(QColor(235, 235, 235))
+            self._placeholder = QIcon(pixmap)
+        return self._placeholder
+
+    def _schedule_render(self, *args):
+        if not self._render_timer.isActive():
+            self._render_timer.start()
+
+    def _visible_rows(self) -> range:
+        lw = self.list_widget
+        count = lw.count()
+        if count == 0:
+            return range(0)
+        vp = lw.viewport().rect()
+        first = bisect_left(range(count), vp.top(),
+                            key=lambda r: lw.visualItemRect(lw.item(r)).bottom())
+        last = bisect_left(range(count), vp.bottom(),
+                           key=lambda r: lw.visualItemRect(lw.item(r)).top())
+        return range(max(0, first - self.PREFETCH_ROWS),
+                     min(count, last + self.PREFETCH_ROWS))
+
+    def _render_visible(self):
+        """Render missing thumbnails near the viewport in short time slices
+        so the event loop keeps running between them."""
+        if not self.doc:
+            return
+        clock = QElapsedTimer()
+        clock.start()
+        for row in self._visible_rows():
+            item = self.list_widget.item(row)
+            if item.data(Qt.ItemDataRole.UserRole):
+                continue
+            if clock.elapsed() >= self.TIME_SLICE_MS:
+                self._schedule_render()
+                return
+            self._render_thumbnail(row, item)
+
+    def _render_thumbnail(self, row: int, item: QListWidgetItem):
+        page = self.doc[row]
+        key = self.render_cache.key(page, self.SCALE)
+        pixmap = self.render_cache.get(key)
+        if pixmap is None:
+            pixmap = self._stored_thumbnail(page)
+        if pixmap is None:
+            source = self.display_lists(row) if self.display_lists else page
+            pix = source.get_pixmap(
+                matrix=fitz.Matrix(self.SCALE, self.SCALE), alpha=False)
+            pixmap = QPixmap.fromImage(qimage_from_pixmap(pix))
+            self._store_thumbnail(page, pix)
+        if key not in self.render_cache:
+            self.render_cache.put(key, pixmap, pixmap_bytes(pixmap))
+        item.setIcon(QIcon(pixmap))
+        item.setData(Qt.ItemDataRole.UserRole, True)
+
+    def _store_key(self, page: fitz.Page) -> str | None:
+        """Disk key of a page that is unchanged since the file was opened."""
+        if (self.thumbnail_store is None or not self.fingerprint
+                or page.xref in self._edited_xrefs):
+            return None
+        return f"{self.fingerprint}:{page.xref}:{self.SCALE}:{page.rotation}"
+
+    def _stored_thumbnail(self, page: fitz.Page) -> QPixmap | None:
+        key = self._store_key(page)
+        data = self.thumbnail_store.get(key) if key else None
+        if data is None:
+            return None
+        pixmap = QPixmap()
+        return pixmap if pixmap.loadFromData(data, "PNG") else None
+
+    def _store_thumbnail(self, page: fitz.Page, pix: fitz.Pixmap):
+        key = self._store_key(page)
+        if key:
+            self.thumbnail_store.put(key, pix.tobytes("png"))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._schedule_render()
 
     def select_page(self, index: int):
         self.list_widget.blockSignals(True)
@@ -68,7 +222,11 @@ class ThumbnailBar(QWidget):
             self.page_selected.emit(row)
 
     def _on_rows_moved(self, parent, start, end, dest, row):
-        self.pages_reordered.emit(start, row if row < start else row - 1)
+        self._dragging = True
+        try:
+            self.pages_reordered.emit(start, row if row < start else row - 1)
+        finally:
+            self._dragging = False
 
     def _show_context_menu(self, pos):
         item = self.list_widget.itemAt(pos)
@@ -1,17 +1,283 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-                              QScrollArea, QPushButton, QSpinBox, QSlider)
-from PyQt6.QtCore import Qt, pyqtSignal, QPoint
-from PyQt6.QtGui import QPixmap, QImage, QPainter, QPen, QColor
+                              QScrollArea, QPushButton, QSpinBox, QSlider,
+                              QStackedWidget, QAbstractScrollArea)
+from PyQt6.QtCore import (Qt, pyqtSignal, QPoint, QRect, QRectF, QTimer,
+                          QElapsedTimer)
+from PyQt6.QtGui import QPainter, QPen, QColor
+from bisect import bisect_right
 import fitz
 
+from ui.render_cache import RenderCache, pixmap_bytes
+from ui.pixmap_utils import render_qimage
+
+TILE_SIZE = 512
+
+
+def tiles_in(rect, width: int, height: int) -> list[tuple[int, int]]:
+    """(col, row) of the tiles of a width x height page touching rect."""
+    cols = range(max(0, rect.left() // TILE_SIZE),
+                 min(width - 1, rect.right()) // TILE_SIZE + 1)
+    rows = range(max(0, rect.top() // TILE_SIZE),
+                 min(height - 1, rect.bottom()) // TILE_SIZE + 1)
+    return [(c, r) for r in rows for c in cols]
+
+
+def cached_tile(render_cache: RenderCache, page: fitz.Page, scale: float,
+                col: int, row: int, display_lists=None):
+    """Return the (x, y, QImage) tile, rendering it on a cache miss.
+
+    ``display_lists`` maps a page index to its fitz.DisplayList; without
+    it the page content is interpreted again for every tile.
+    """
+    key = render_cache.key(page, scale, "tile", col, row)
+    tile = render_cache.get(key)
+    if tile is None:
+        clip = fitz.Rect(col * TILE_SIZE / scale, row * TILE_SIZE / scale,
+                         (col + 1) * TILE_SIZE / scale,
+                         (row + 1) * TILE_SIZE / scale)
+        source = display_lists(page.number) if display_lists else page
+        img = render_qimage(source, scale, clip)
+        tile = (img._pix.x, img._pix.y, img)
+        render_cache.put(key, tile, pixmap_bytes(tile[2]))
+    return tile
+
+
+class PageCanvas(QWidget):
+    """Draws one page tile by tile, rendering only the visible tiles."""
+
+    def __init__(self, render_cache: RenderCache, display_lists=None,
+                 parent=None):
+        super().__init__(parent)
+        self.render_cache = render_cache
+        self.display_lists = display_lists
+        self.doc = None
+        self.page_index = 0
+        self.scale = 1.0  # scale the tiles are rendered at
+        self.display_scale = 1.0  # differs from scale while previewing
+        self._page_size = (0.0, 0.0)
+        self._tiles = {}  # (col, row) -> (x, y, QImage)
+        self.setFixedSize(0, 0)
+
+    def set_page(self, doc: fitz.Document | None, index: int, scale: float):
+        self.doc = doc
+        self.page_index = index
+        self.scale = self.display_scale = scale
+        self._tiles.clear()
+        if not doc or doc.page_count == 0:
+            self.doc = None
+            self._page_size = (0.0, 0.0)
+        else:
+            rect = doc[index].rect
+            self._page_size = (rect.width, rect.height)
+        self.setFixedSize(*self._pixel_size(scale))
+        self.update()
+
+    def preview_scale(self, scale: float):
+        """Stretch the tiles at hand to ``scale`` without rendering."""
+        if not self.doc:
+            return
+        self.display_scale = scale
+        self.setFixedSize(*self._pixel_size(scale))
+        self.update()
+
+    def _pixel_size(self, scale: float) -> tuple[int, int]:
+        if not self.doc:
+            return 0, 0
+        w, h = self._page_size
+        return max(1, round(w * scale)), max(1, round(h * scale))
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(event.rect(), QColor(255, 255, 255))
+        if not self.doc:
+            return
+        if self.display_scale != self.scale:
+            self._paint_preview(painter, event.rect())
+            return
+        page = self.doc[self.page_index]
+        for key in self._tiles_in(event.rect()):
+            tile = self._tiles.get(key)
+            if tile is None:
+                tile = cached_tile(self.render_cache, page, self.scale, *key,
+                                   self.display_lists)
+                self._tiles[key] = tile
+            x, y, image = tile
+            painter.drawImage(x, y, image)
+        painter.end()
+        self._drop_hidden_tiles()
+
+    def _paint_preview(self, painter: QPainter, rect):
+        """Draw already rendered tiles scaled by QPainter."""
+        factor = self.display_scale / self.scale
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        painter.scale(factor, factor)
+        page = self.doc[self.page_index]
+        source = QRectF(rect.x() / factor, rect.y() / factor,
+                        rect.width() / factor, rect.height() / factor)
+        for key in self._tiles_in(source.toAlignedRect()):
+            tile = self._tiles.get(key) or self.render_cache.peek(
+                self.render_cache.key(page, self.scale, "tile", *key))
+            if tile:
+                x, y, image = tile
+                painter.drawImage(x, y, image)
+
+    def _tiles_in(self, rect):
+        return tiles_in(rect, *self._pixel_size(self.scale))
+
+    def _drop_hidden_tiles(self):
+        """Forget tiles more than one tile away from the visible area."""
+        size = TILE_SIZE
+        keep = set(self._tiles_in(self.visibleRegion().boundingRect()
+                                  .adjusted(-size, -size, size, size)))
+        for key in [k for k in self._tiles if k not in keep]:
+            del self._tiles[key]
+
+
+class ContinuousView(QAbstractScrollArea):
+    """Vertically scrolling view of all pages.
+
+    The document is laid out from a table of page sizes and the scroll
+    bars are driven from that table, so no widget spans the whole
+    document. Only pages within one screen of the viewport get a
+    PageCanvas.
+    """
+
+    PAGE_GAP = 10
+
+    current_page_changed = pyqtSignal(int)
+
+    def __init__(self, render_cache: RenderCache, display_lists=None,
+                 parent=None):
+        super().__init__(parent)
+        self.render_cache = render_cache
+        self.display_lists = display_lists
+        self.doc = None
+        self.scale = 1.0  # layout scale
+        self.render_scale = 1.0  # differs from scale while previewing
+        self._sizes = []  # (width, height) in points
+        self._offsets = []  # top of each page in pixels
+        self._content_size = (0, 0)
+        self._canvases = {}  # page index -> PageCanvas
+        self._current = 0
+        self.viewport().setStyleSheet("background: #e8e8e8;")
+        self.verticalScrollBar().setSingleStep(40)
+        self.horizontalScrollBar().setSingleStep(40)
+
+    def set_document(self, doc: fitz.Document | None, scale: float):
+        self.doc = doc
+        self.scale = self.render_scale = scale
+        self.reload()
+
+    def reload(self):
+        """Rebuild the page size table after pages changed."""
+        self._sizes = []
+        if self.doc:
+            for i in range(self.doc.page_count):
+                rect = self.doc[i].rect
+                self._sizes.append((rect.width, rect.height))
+        self._relayout()
+
+    def set_scale(self, scale: float, preview: bool = False):
+        """Change the zoom; a preview only stretches the pages on screen."""
+        index = self._current
+        fraction = 0.0
+        if index < len(self._offsets):
+            top = self.verticalScrollBar().value()
+            fraction = (top - self._offsets[index]) / self.scale
+        self.scale = scale
+        if preview:
+            for canvas in self._canvases.values():
+                canvas.preview_scale(scale)
+        else:
+            self.render_scale = scale
+        self._relayout(keep_canvases=preview)
+        if index < len(self._offsets):
+            self.verticalScrollBar().setValue(
+                self._offsets[index] + round(fraction * scale))
+
+    def scroll_to_page(self, index: int):
+        if 0 <= index < len(self._offsets):
+            self._current = index
+            self.verticalScrollBar().setValue(
+                self._offsets[index] - self.PAGE_GAP)
+
+    def _relayout(self, keep_canvases: bool = False):
+        if not keep_canvases:
+            for canvas in self._canvases.values():
+                canvas.deleteLater()
+            self._canvases.clear()
+        self._offsets = []
+        y = self.PAGE_GAP
+        width = 0
+        for w, h in self._sizes:
+            self._offsets.append(y)
+            y += max(1, round(h * self.scale)) + self.PAGE_GAP
+            width = max(width, round(w * self.scale))
+        self._content_size = (width + 2 * self.PAGE_GAP, y)
+        self._update_scrollbars()
+        self._update_visible(emit=False)
+
+    def _update_scrollbars(self):
+        width, height = self._content_size
+        vp = self.viewport().size()
+        self.verticalScrollBar().setPageStep(vp.height())
+        self.verticalScrollBar().setRange(0, max(0, height - vp.height()))
+        self.horizontalScrollBar().setPageStep(vp.width())
+        self.horizontalScrollBar().setRange(0, max(0, width - vp.width()))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_scrollbars()
+        self._update_visible(emit=False)
+
+    def scrollContentsBy(self, dx, dy):
+        self._update_visible()
+
+    def _update_visible(self, emit: bool = True):
+        if not self._offsets:
+            return
+        top = self.verticalScrollBar().value()
+        left = self.horizontalScrollBar().value()
+        height = self.viewport().height()
+        center = max(self.viewport().width(), self._content_size[0]) // 2
+        first = max(0, bisect_right(self._offsets, top - height) - 1)
+        last = min(len(self._offsets),
+                   bisect_right(self._offsets, top + 2 * height))
+        for index in [i for i in self._canvases if not first <= i < last]:
+            self._canvases.pop(index).deleteLater()
+        for index in range(first, last):
+            canvas = self._canvases.get(index)
+            if canvas is None:
+                canvas = PageCanvas(self.render_cache, self.display_lists,
+                                    self.viewport())
+                canvas.set_page(self.doc, index, self.render_scale)
+                canvas.preview_scale(self.scale)
+                canvas.show()
+                self._canvases[index] = canvas
+            canvas.move(center - canvas.width() // 2 - left,
+                        self._offsets[index] - top)
+        current = max(0, bisect_right(self._offsets, top + height // 3) - 1)
+        if emit and current != self._current:
+            self._current = current
+            self.current_page_changed.emit(current)
+
 
 class ViewerWidget(QWidget):
     """PDF page viewer with zoom and navigation."""
 
     page_changed = pyqtSignal(int)
 
-    def __init__(self, parent=None):
+    ZOOM_DELAY_MS = 200  # slider rest time before the sharp render
+    PREFETCH_DEPTH = 2  # neighbouring pages rendered ahead on each side
+    PREFETCH_MAX_BYTES = 64 * 1024 * 1024
+    TIME_SLICE_MS = 15
+
+    def __init__(self, render_cache: RenderCache | None = None,
+                 display_lists=None, parent=None):
         super().__init__(parent)
+        self.render_cache = (render_cache if render_cache is not None
+                             else RenderCache())
+        self.display_lists = display_lists
         self.doc = None
         self.current_page = 0
         self.zoom = 1.0
@@ -19,6 +285,17 @@ class ViewerWidget(QWidget):
         self._draw_points = []
         self._annotations_overlay = []
         self._tool_mode = None  # None, "text", "draw", "highlight"
+        self._zoom_timer = QTimer(self)
+        self._zoom_timer.setSingleShot(True)
+        self._zoom_timer.setInterval(self.ZOOM_DELAY_MS)
+        self._zoom_timer.timeout.connect(self._apply_zoom)
+        self.prefetch_depth = self.PREFETCH_DEPTH
+        self.prefetch_max_bytes = self.PREFETCH_MAX_BYTES
+        self._prefetch_queue = []  # (page index, scale, col, row)
+        self._prefetch_bytes = 0
+        self._prefetch_timer = QTimer(self)
+        self._prefetch_timer.setSingleShot(True)
+        self._prefetch_timer.timeout.connect(self._prefetch_step)
         self._setup_ui()
 
     def _setup_ui(self):
@@ -46,11 +323,16 @@ class ViewerWidget(QWidget):
         self.zoom_slider.valueChanged.connect(self._on_zoom_changed)
         self.zoom_label = QLabel("100%")
 
+        self.btn_continuous = QPushButton("Fortlaufend")
+        self.btn_continuous.setCheckable(True)
+        self.btn_continuous.toggled.connect(self._on_continuous_toggled)
+
         nav.addWidget(self.btn_prev)
         nav.addWidget(self.page_spin)
         nav.addWidget(self.page_label)
         nav.addWidget(self.btn_next)
         nav.addStretch()
+        nav.addWidget(self.btn_continuous)
         nav.addWidget(QLabel("Zoom:"))
         nav.addWidget(self.zoom_slider)
         nav.addWidget(self.zoom_label)
@@ -59,39 +341,113 @@ class ViewerWidget(QWidget):
 
         # Scroll area for page display
         self.scroll = QScrollArea()
-        self.scroll.setWidgetResizable(True)
+        self.scroll.setWidgetResizable(False)
         self.scroll.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
-        self.page_label_img = QLabel()
-        self.page_label_img.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.scroll.setWidget(self.page_label_img)
+        self.canvas = PageCanvas(self.render_cache, self.display_lists)
+        self.scroll.setWidget(self.canvas)
+
+        self.continuous = ContinuousView(self.render_cache,
+                                         self.display_lists)
+        self.continuous.current_page_changed.connect(self._on_scrolled_to)
 
-        layout.addWidget(self.scroll)
+        self.stack = QStackedWidget()
+        self.stack.addWidget(self.scroll)
+        self.stack.addWidget(self.continuous)
+        layout.addWidget(self.stack)
+
+    def is_continuous(self) -> bool:
+        return self.btn_continuous.isChecked()
 
     def set_document(self, doc: fitz.Document):
         self.doc = doc
         self.current_page = 0
         self.page_spin.setMaximum(max(1, doc.page_count))
         self.page_label.setText(f"/ {doc.page_count}")
+        if self.is_continuous():
+            self.continuous.set_document(doc, self.zoom * 1.5)
         self.render_page()
 
     def render_page(self):
         if not self.doc or self.doc.page_count == 0:
-            self.page_label_img.clear()
+            self.canvas.set_page(None, 0, 1.0)
+            self.continuous.set_document(None, 1.0)
+            return
+        if self.is_continuous():
+            self.continuous.scroll_to_page(self.current_page)
+        else:
+            self.canvas.set_page(self.doc, self.current_page, self.zoom * 1.5)
+            self._schedule_prefetch()
+        self._show_page_number()
+
+    def _schedule_prefetch(self):
+        """Queue the tiles that the next page turns will show first."""
+        self._prefetch_queue.clear()
+        self._prefetch_bytes = 0
+        if self.prefetch_depth <= 0:
+            return
+        scale = self.zoom * 1.5
+        vp = self.scroll.viewport().size()
+        area = QRect(self.scroll.horizontalScrollBar().value(),
+                     self.scroll.verticalScrollBar().value(),
+                     vp.width(), vp.height())
+        for distance in range(1, self.prefetch_depth + 1):
+            for index in (self.current_page + distance,
+                          self.current_page - distance):
+                if not 0 <= index < self.doc.page_count:
+                    continue
+                rect = self.doc[index].rect
+                width = max(1, round(rect.width * scale))
+                height = max(1, round(rect.height * scale))
+                self._prefetch_queue.extend(
+                    (index, scale, col, row)
+                    for col, row in tiles_in(area, width, height))
+        # let the current page paint before prefetching starts
+        self._prefetch_timer.start(50)
+
+    def _prefetch_step(self):
+        """Render queued tiles into the cache in short idle time slices."""
+        if not self.doc:
             return
-        page = self.doc[self.current_page]
-        mat = fitz.Matrix(self.zoom * 1.5, self.zoom * 1.5)
-        pix = page.get_pixmap(matrix=mat, alpha=False)
-        img = QImage(pix.samples, pix.width, pix.height,
-                     pix.stride, QImage.Format.Format_RGB888)
-        pixmap = QPixmap.fromImage(img)
-        self.page_label_img.setPixmap(pixmap)
-        self.page_label_img.resize(pixmap.size())
+        limit = min(self.prefetch_max_bytes,
+                    self.render_cache.max_bytes // 2)
+        clock = QElapsedTimer()
+        clock.start()
+        while self._prefetch_queue:
+            if self._prefetch_bytes >= limit:
+                self._prefetch_queue.clear()
+                return
+            if clock.elapsed() >= self.TIME_SLICE_MS:
+                self._prefetch_timer.start(0)
+                return
+            index, scale, col, row = self._prefetch_queue.pop(0)
+            page = self.doc[index]
+            key = self.render_cache.key(page, scale, "tile", col, row)
+            if self.render_cache.peek(key) is None:
+                tile = cached_tile(self.render_cache, page, scale, col, row,
+                                   self.display_lists)
+                self._prefetch_bytes += pixmap_bytes(tile[2])
+
+    def _show_page_number(self):
         self.page_spin.blockSignals(True)
         self.page_spin.setValue(self.current_page + 1)
         self.page_spin.blockSignals(False)
         self.page_changed.emit(self.current_page)
 
+    def _on_scrolled_to(self, index: int):
+        self.current_page = index
+        self._show_page_number()
+
+    def _on_continuous_toggled(self, checked: bool):
+        if checked:
+            self.canvas.set_page(None, 0, 1.0)
+            self.stack.setCurrentWidget(self.continuous)
+            self.continuous.set_document(self.doc, self.zoom * 1.5)
+        else:
+            self.continuous.set_document(None, 1.0)
+            self.stack.setCurrentWidget(self.scroll)
+        self.render_page()
+
     def prev_page(self):
         if self.current_page > 0:
             self.current_page -= 1
@@ -111,11 +467,27 @@ class ViewerWidget(QWidget):
         self.go_to_page(val - 1)
 
     def _on_zoom_changed(self, val):
+        # queued tiles belong to the old zoom; render_page queues new ones
+        self._prefetch_timer.stop()
+        self._prefetch_queue.clear()
         self.zoom = val / 100.0
         self.zoom_label.setText(f"{val}%")
-        self.render_page()
+        if self.is_continuous():
+            self.continuous.set_scale(self.zoom * 1.5, preview=True)
+        else:
+            self.canvas.preview_scale(self.zoom * 1.5)
+        self._zoom_timer.start()
+
+    def _apply_zoom(self):
+        """Render sharply once the zoom slider has come to rest."""
+        if self.is_continuous():
+            self.continuous.set_scale(self.zoom * 1.5)
+        else:
+            self.render_page()
 
     def refresh(self):
+        if self.is_continuous():
+            self.continuous.reload()
         self.render_page()
 
     def set_tool_mode(self, mode):